@@ -1,15 +1,28 @@
 # admin/routes.py
-from flask import Blueprint, jsonify, render_template, request, redirect, url_for, flash
+from flask import Blueprint, abort, jsonify, render_template, request, redirect, url_for, flash
 from flask_login import login_required, current_user
-from utils.security import handle_exception, role_required
+from utils.file_delivery import send_private_file
+from utils.guardian_consent import campaign_progress, due_for_reminder, queue_reminders, recent_campaigns, start_campaign, unverified_pipeline
+from utils.json_stream import stream_export
+from utils.previews import get_preview_path
+from utils.query_metrics import metrics_snapshot
+from utils.security import handle_exception, role_required, sanitize_input
+from utils.slow_queries import SLOW_QUERY_MS, recent_slow_queries
+from utils.tour_dates import format_tour_date, upcoming_tours_filter
 from bson.objectid import ObjectId
-from extensions import db, mail, serializer
-from flask_mail import Message
-from datetime import datetime, timedelta
+from extensions import db, mongo
+from datetime import datetime
 import os
 
 admin_bp = Blueprint("admin", __name__)
 
+# Upload fields that reviewers can open previews for
+REVIEWABLE_UPLOADS = ("student_id", "front_of_id", "back_of_id", "photo_id", "background_check")
+
+# Reservations per page of the guardian verification report, and the export's CSV columns
+GUARDIAN_REPORT_PAGE_SIZE = 50
+GUARDIAN_EXPORT_COLUMNS = ["student", "email", "tour", "date", "last_resent"]
+
 @admin_bp.route('/admin/student_ids')
 @login_required
 def admin_student_ids():
@@ -18,11 +31,76 @@ def admin_student_ids():
             flash("Access denied.")
             return redirect(url_for('home'))
 
-        users = db.users.find({
-            "profile.student_id_file": {"$exists": True}
-        })
+        users = db.users.find(
+            {"$or": [{f"profile.{field}_file": {"$exists": True}} for field in REVIEWABLE_UPLOADS]},
+            {"name": 1, "email": 1, "role": 1, "profile": 1}
+        )
+
+        return render_template('admin/admin_student_ids.html', users=users, fields=REVIEWABLE_UPLOADS)
+    except Exception as e:
+        handle_exception(e)
+        return redirect(url_for('home'))
+
+@admin_bp.route("/uploads/<user_id>/<field>/preview/<variant>")
+@login_required
+@role_required("admin")
+def upload_preview(user_id, field, variant):
+    """
+    Serve a downscaled preview of an uploaded ID instead of the full-size original.
+    WebP is sent when the browser accepts it, JPEG otherwise.
+    """
+    if field not in REVIEWABLE_UPLOADS or not ObjectId.is_valid(user_id):
+        abort(404)
+
+    user = db.users.find_one({"_id": ObjectId(user_id)}, {"profile": 1})
+    if not user:
+        abort(404)
+
+    extension = "webp" if request.accept_mimetypes["image/webp"] else "jpeg"
+    preview_path = get_preview_path(user.get("profile"), field, variant, extension)
+
+    # Preview names carry the upload timestamp, so a cached copy never goes stale
+    response = send_private_file(preview_path, mimetype=f"image/{extension}", max_age=86400)
+    response.vary.add("Accept")
+    return response
+
+@admin_bp.route("/uploads/<user_id>/<field>")
+@login_required
+@role_required("admin")
+def download_upload(user_id, field):
+    """
+    Stream an original private upload (ID scan, background check PDF) to an admin.
+    Supports Range and conditional requests; see utils.file_delivery.
+    """
+    if field not in REVIEWABLE_UPLOADS or not ObjectId.is_valid(user_id):
+        abort(404)
+
+    user = db.users.find_one({"_id": ObjectId(user_id)}, {f"profile.{field}_file": 1})
+    if not user:
+        abort(404)
 
-        return render_template('admin_student_ids.html', users=users)
+    stored_path = user.get("profile", {}).get(f"{field}_file")
+    return send_private_file(stored_path, as_attachment=request.args.get("download") == "1")
+
+@admin_bp.route("/query-metrics")
+@login_required
+@role_required("admin")
+def query_metrics():
+    try:
+        return render_template("admin/query_metrics.html", rows=metrics_snapshot(), pool=mongo.pool_metrics.snapshot(), pool_options=mongo.client_options())
+    except Exception as e:
+        handle_exception(e)
+        return redirect(url_for('home'))
+
+@admin_bp.route("/slow-queries")
+@login_required
+@role_required("admin")
+def slow_queries():
+    try:
+        endpoint = sanitize_input(request.args.get("endpoint")) or None
+        collection = sanitize_input(request.args.get("collection")) or None
+        entries = recent_slow_queries(db, endpoint=endpoint, collection=collection)
+        return render_template("admin/slow_queries.html", entries=entries, threshold_ms=SLOW_QUERY_MS, endpoint=endpoint, collection=collection)
     except Exception as e:
         handle_exception(e)
         return redirect(url_for('home'))
@@ -107,28 +185,28 @@ def edit_university(id):
 @role_required("admin")
 def guardian_verification_report():
     try:
-        unverified_reservations = list(db.reservations.find({"parent_verified": {"$ne": True}}))
-
-        student_ids = [res["user_id"] for res in unverified_reservations]
-        tour_ids = [res["tour_id"] for res in unverified_reservations]
+        tour_id = sanitize_input(request.args.get("tour_id")) or None
+        after = request.args.get("after")
+        after = ObjectId(after) if after and ObjectId.is_valid(after) else None
 
-        users = {str(u["_id"]): u for u in db.users.find({"_id": {"$in": student_ids}})}
-        tours = {str(t["_id"]): t for t in db.tour_instances.find({"_id": {"$in": tour_ids}})}
+        rows = list(db.reservations.aggregate(unverified_pipeline(
+            tour_id=tour_id, keep_missing=True, after=after, limit=GUARDIAN_REPORT_PAGE_SIZE + 1
+        )))
+        next_after = str(rows[GUARDIAN_REPORT_PAGE_SIZE - 1]["_id"]) if len(rows) > GUARDIAN_REPORT_PAGE_SIZE else None
 
-        detailed_list = []
-        for res in unverified_reservations:
-            student = users.get(str(res["user_id"]))
-            tour = tours.get(str(res["tour_id"]))
+        detailed_list = [{
+            "student_name": row.get("student_name") or "N/A",
+            "tour_title": row.get("tour_title") or "N/A",
+            "tour_date": format_tour_date(row.get("tour_date"), "%B %d, %Y"),
+            "parent_email": row.get("parent_email") or "N/A",
+            "last_resent": row.get("last_consent_resent"),
+            "reservation_id": str(row["_id"])
+        } for row in rows[:GUARDIAN_REPORT_PAGE_SIZE]]
 
-            detailed_list.append({
-                "student_name": student.get("name", "N/A"),
-                "tour_title": tour.get("title", "N/A"),
-                "tour_date": tour.get("date"),
-                "parent_email": res.get("parent_email", "N/A"),
-                "reservation_id": str(res["_id"])
-            })
-
-        return render_template("admin/guardian_verification_report.html", reservations=detailed_list)
+        return render_template(
+            "admin/guardian_verification_report.html",
+            reservations=detailed_list, tour_id=tour_id, next_after=next_after, first_page=after is None
+        )
     except Exception as e:
         handle_exception(e)
         return redirect(url_for('home'))
@@ -138,75 +216,80 @@ def guardian_verification_report():
 @role_required("admin")
 def resend_parent_email(reservation_id):
     try:
-        reservation = db.reservations.find_one({"_id": ObjectId(reservation_id)})
-        if not reservation:
-            flash("Reservation not found.", "danger")
-            return redirect(url_for("admin.guardian_verification_report"))
-
-        user = db.users.find_one({"_id": reservation["user_id"]})
-        tour = db.tour_instances.find_one({"_id": reservation["tour_id"]})
-        parent_email = reservation.get("parent_email")
-
-        if not user or not tour or not parent_email:
-            flash("Missing data to resend email.", "warning")
+        now = datetime.utcnow()
+        rows = list(db.reservations.aggregate(
+            unverified_pipeline({"_id": ObjectId(reservation_id), **due_for_reminder(now)})
+        ))
+        if not rows:
+            flash("No reminder sent: the reservation is verified, is missing its student, tour or "
+                  "parent email, or was already reminded within the last hour.", "info")
             return redirect(url_for("admin.guardian_verification_report"))
 
-        last_resent = reservation.get("last_consent_resent")
-        if last_resent and datetime.utcnow() - last_resent < timedelta(hours=1):
+        if queue_reminders(db, rows, now):
+            flash(f"Consent link resent to {rows[0]['parent_email']}", "success")
+        else:
             flash("This consent email was already resent within the last hour.", "info")
-            return redirect(url_for("admin.guardian_verification_report"))
-
-        token = serializer.dumps({
-            "student_id": str(user["_id"]),
-            "tour_id": str(tour["_id"]),
-            "parent_email": parent_email
-        })
-
-        link = url_for("parents.confirm_parent", token=token, _external=True)
-
-        msg = Message("Parental Consent Reminder", recipients=[parent_email])
-        msg.body = f"""
-        Hello,
-
-        This is a reminder to complete your parental consent for:
-        Student: {user['name']}
-        Tour: {tour.get('title', 'a scheduled tour')} on {tour.get('date', '')}
-
-        Confirm here: {link}
-
-        If you already completed this, thank you. This link expires in 1 hour.
-        """
-        mail.send(msg)
+        return redirect(url_for("admin.guardian_verification_report"))
+    except Exception as e:
+        handle_exception(e)
+        return redirect(url_for('home'))
 
-        db.reservations.update_one(
-            {"_id": ObjectId(reservation_id)},
-            {"$set": {"last_consent_resent": datetime.utcnow()}}
-        )
+@admin_bp.route("/consent-reminders", methods=["GET", "POST"])
+@login_required
+@role_required("admin")
+def consent_reminders():
+    try:
+        if request.method == "POST":
+            tour_id = sanitize_input(request.form.get("tour_id")) or None
+            start = sanitize_input(request.form.get("start")) or None
+            end = sanitize_input(request.form.get("end")) or None
+            if not tour_id and not start:
+                start = datetime.utcnow().strftime("%Y-%m-%d")  # never remind for tours already run
+            campaign_id = start_campaign(db, tour_id=tour_id, start=start, end=end, created_by=current_user.get_id())
+            campaign = campaign_progress(db, campaign_id)
+            flash(f"Queued {campaign['queued']} consent reminders ({campaign['selected']} due).", "success")
+            return redirect(url_for("admin.consent_reminders"))
 
-        flash(f"Consent link resent to {parent_email}", "success")
-        return redirect(url_for("admin.guardian_verification_report"))
+        tours = [
+            {**tour, "date": format_tour_date(tour.get("date"))}
+            for tour in db.tour_instances.find(upcoming_tours_filter(), {"title": 1, "date": 1}).sort("date", 1)
+        ]
+        return render_template("admin/consent_reminders.html", campaigns=recent_campaigns(db), tours=tours)
     except Exception as e:
         handle_exception(e)
         return redirect(url_for('home'))
 
+@admin_bp.route("/consent-reminders/<campaign_id>")
+@login_required
+@role_required("admin")
+def consent_campaign_progress(campaign_id):
+    if not ObjectId.is_valid(campaign_id):
+        abort(404)
+    campaign = campaign_progress(db, ObjectId(campaign_id))
+    if campaign is None:
+        abort(404)
+    return jsonify(campaign)
+
 @admin_bp.route("/guardian-verification-export", methods=["GET"])
 @login_required
 @role_required("admin")
 def guardian_verification_export():
     try:
-        unverified = db.reservations.find({"parent_verified": {"$ne": True}})
-        data = []
-        for res in unverified:
-            user = db.users.find_one({"_id": res["user_id"]})
-            tour = db.tour_instances.find_one({"_id": res["tour_id"]})
-            data.append({
-                "student": user.get("name", "N/A"),
-                "email": res.get("parent_email", "N/A"),
-                "tour": tour.get("title", "N/A"),
-                "date": tour.get("date", "N/A"),
-                "last_resent": res.get("last_consent_resent", "Never")
-            })
-        return jsonify(data)
+        tour_id = sanitize_input(request.args.get("tour_id")) or None
+        # One aggregation joins every row's student and tour; nothing is looked up per row
+        unverified = db.reservations.aggregate(unverified_pipeline(tour_id=tour_id, keep_missing=True))
+
+        def rows():
+            for res in unverified:
+                yield {
+                    "student": res.get("student_name") or "N/A",
+                    "email": res.get("parent_email") or "N/A",
+                    "tour": res.get("tour_title") or "N/A",
+                    "date": res.get("tour_date") or "N/A",
+                    "last_resent": res.get("last_consent_resent") or "Never"
+                }
+
+        return stream_export(rows(), "guardian_verification", columns=GUARDIAN_EXPORT_COLUMNS)
     except Exception as e:
         handle_exception(e)
         return redirect(url_for('home'))
\ No newline at end of file
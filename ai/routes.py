@@ -1,10 +1,9 @@
 # In ai/routes.py
 from flask import Blueprint, request, jsonify, redirect, render_template, url_for
-from utils.qa_loader import openai_client, load_knowledge_base, get_relevant_answer
+from utils.qa_loader import get_knowledge_base, get_openai_client, get_relevant_answer
 from datetime import datetime
-from flask_limiter import Limiter
 from utils.security import handle_exception, role_required
-from flask_limiter.util import get_remote_address
+from utils.retention import question_cluster, top_unanswered_clusters
 from bson import ObjectId
 
 from extensions import db, mail, serializer
@@ -12,23 +11,12 @@ import os
 
 ai_bp = Blueprint("ai", __name__)
 
-
-# Limiter setup
-limiter = Limiter(get_remote_address, app=None, default_limits=["30 per hour"])
-
-# Attach limiter in app.py like: limiter.init_app(app)
-
-# OpenAI client
-response = openai_client.responses.create(
-    model="gpt-4.1",
-    input="Write a one-sentence bedtime story about a unicorn."
-)
+# Rate limits for these routes are set in utils/rate_limits.py (ROUTE_LIMITS)
 
 qa_file_path = os.path.join("static", "qa_data.txt")
-knowledge_base = load_knowledge_base(qa_file_path)
+UNANSWERED_PAGE_SIZE = 500
 
 @ai_bp.route("/ai/ask", methods=["POST"])
-@limiter.limit("10 per minute")
 def ask_bot():
     try:
         data = request.get_json()
@@ -37,11 +25,11 @@ def ask_bot():
         if not user_question:
             return jsonify({"answer": "Please enter a question."}), 400
 
-        relevant_context = get_relevant_answer(user_question, knowledge_base)
+        relevant_context = get_relevant_answer(user_question, get_knowledge_base(qa_file_path))
         prompt = f"Answer this question using ONLY the following text. If you don't know, say 'I'm not sure.':\n\n{relevant_context}\n\nQ: {user_question}\nA:"
 
         try:
-            completion = client.chat.completions.create(
+            completion = get_openai_client().chat.completions.create(
                 model="gpt-3.5-turbo",
                 messages=[{"role": "user", "content": prompt}]
             )
@@ -50,6 +38,7 @@ def ask_bot():
             if "I don't know" in answer or "I'm not sure" in answer:
                 db.unanswered.insert_one({
                     "question": user_question,
+                    "cluster": question_cluster(user_question),
                     "timestamp": datetime.utcnow()
                 })
 
@@ -65,8 +54,9 @@ def ask_bot():
 @ai_bp.route("/admin/unanswered")
 def view_unanswered():
     try:
-        questions = list(db.unanswered.find().sort("timestamp", -1))
-        return render_template("admin/unanswered.html", questions=questions)
+        questions = list(db.unanswered.find().sort("timestamp", -1).limit(UNANSWERED_PAGE_SIZE))
+        clusters = top_unanswered_clusters(db)
+        return render_template("admin/unanswered.html", questions=questions, clusters=clusters)
     except Exception as e:
         handle_exception(e)
         return redirect(url_for('home'))
\ No newline at end of file
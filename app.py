@@ -1,150 +1,323 @@
 # Refactored college_bound/app.py
 from flask import Flask, render_template, request, redirect, url_for, flash
 from flask_login import LoginManager, current_user
-from bson.objectid import ObjectId
 from dotenv import load_dotenv
-import os
-from utils.security import sanitize_input
-from extensions import db, mail, serializer
-
-# Blueprint registration
-from ai.routes import ai_bp
-from auth.routes import auth_bp
-from tours.routes import tours_bp
-from admin.routes import admin_bp
-from driver.routes import driver_bp
-from operations.routes import operations_bp
-from parent.routes import parent_bp
-from student.routes import student_bp
-from donate.routes import donate_bp
-from flask_dance.contrib.google import make_google_blueprint, google
-from flask_dance.contrib.facebook import make_facebook_blueprint, facebook
-import extensions
-from models.user import User
+from importlib import import_module
+import click, os
+from utils.boot_profile import BootProfile
+from extensions import db, mail
 
 from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
-
-limiter = Limiter(get_remote_address, app=None, default_limits=["30 per hour"])
-
-# Load environment variables
-load_dotenv()
-
-# Initialize Flask app
-app = Flask(__name__, static_folder="templates/static")
-app.secret_key = os.getenv("SECRET_KEY", "supersecretkey")
-app.register_blueprint(ai_bp, url_prefix="/auth")
-app.register_blueprint(auth_bp, url_prefix="/auth")
-app.register_blueprint(tours_bp, url_prefix="/tours")
-app.register_blueprint(admin_bp, url_prefix="/admin")
-app.register_blueprint(driver_bp, url_prefix="/driver")
-app.register_blueprint(operations_bp, url_prefix="/operations")
-app.register_blueprint(parent_bp, url_prefix="/parent")
-app.register_blueprint(student_bp, url_prefix="/student")
-app.register_blueprint(donate_bp, url_prefix="/donate")
-
-from flask_mail import Mail
-
-app.config['MAIL_SERVER'] = 'smtp.gmail.com'
-app.config['MAIL_PORT'] = 587
-app.config['MAIL_USE_TLS'] = True
-app.config['MAIL_USERNAME'] = 'your_email@example.com'
-app.config['MAIL_PASSWORD'] = 'your_email_password'
-app.config['MAIL_DEFAULT_SENDER'] = 'your_email@example.com'
-
-mail = Mail(app)
-mail.init_app(app)
-limiter.init_app(app)
-
-# Login manager setup
+from utils.rate_limits import RATELIMIT_DEFAULT, RATELIMIT_STORAGE_URI, apply_route_limits, rate_limit_key
+
+# The only limiter in the app; counters are shared across workers through RATELIMIT_STORAGE_URI
+limiter = Limiter(
+    rate_limit_key,
+    app=None,
+    default_limits=[RATELIMIT_DEFAULT],
+    storage_uri=RATELIMIT_STORAGE_URI,
+    strategy="fixed-window",
+)
+
+
+@limiter.request_filter
+def skip_warm_up_requests():
+    from utils.template_cache import is_warm_up_request
+    return is_warm_up_request(request)
+
+
 login_manager = LoginManager()
-login_manager.init_app(app)
 login_manager.login_view = "auth.login"
 
-login_manager.init_app(app)
+# (name, module, blueprint attribute, url prefix). Modules are imported inside
+# create_app, so importing this file does not pull in every blueprint's dependencies.
+BLUEPRINTS = [
+    ("auth", "auth.routes", "auth_bp", "/auth"),
+    ("ai", "ai.routes", "ai_bp", "/auth"),
+    ("tours", "tours.routes", "tours_bp", "/tours"),
+    ("admin", "admin.routes", "admin_bp", "/admin"),
+    ("driver", "driver.routes", "driver_bp", "/driver"),
+    ("operations", "operations.routes", "operations_bp", "/operations"),
+    ("parent", "parent.routes", "parent_bp", "/parent"),
+    ("student", "student.routes", "student_bp", "/student"),
+    ("donate", "donate.routes", "donate_bp", "/donate"),
+]
+
+DEFAULT_CONFIG = {
+    # Overridable from the environment so `flask smtp-sink` can stand in for the provider locally
+    "MAIL_SERVER": os.getenv("MAIL_SERVER", "smtp.gmail.com"),
+    "MAIL_PORT": int(os.getenv("MAIL_PORT", "587")),
+    "MAIL_USE_TLS": os.getenv("MAIL_USE_TLS", "true").lower() == "true",
+    "MAIL_USERNAME": os.getenv("MAIL_USERNAME", "your_email@example.com"),
+    "MAIL_PASSWORD": os.getenv("MAIL_PASSWORD", "your_email_password"),
+    "MAIL_DEFAULT_SENDER": os.getenv("MAIL_DEFAULT_SENDER", "your_email@example.com"),
+    "MAX_CONTENT_LENGTH": 5 * 1024 * 1024,  # 5MB max file size
+    "OAUTH_LOGIN": True,
+    "BLUEPRINTS": None,  # None registers all of BLUEPRINTS; a list of names registers only those
+}
+
+
+def create_app(config=None):
+    """
+    Build the Flask app.
+
+    Args:
+        config (dict): Overrides for DEFAULT_CONFIG and any Flask setting. Tests can pass
+            e.g. {"BLUEPRINTS": ["auth", "tours"], "OAUTH_LOGIN": False} to skip subsystems.
+
+    Returns:
+        Flask: The configured app. Time per stage is kept on app.extensions["boot_profile"]
+        and logged when BOOT_PROFILE=true.
+    """
+    profile = BootProfile()
+
+    with profile.stage("config"):
+        # Load environment variables
+        load_dotenv()
+
+        app = Flask(__name__, static_folder="templates/static")
+        from utils.json_stream import MongoJSONProvider
+        app.json = MongoJSONProvider(app)  # jsonify() understands ObjectId and Decimal128
+        app.secret_key = os.getenv("SECRET_KEY", "supersecretkey")
+        app.config.from_mapping(DEFAULT_CONFIG)
+        if config:
+            app.config.from_mapping(config)
+
+        from utils.file_delivery import FILE_DELIVERY
+        app.config.setdefault("USE_X_SENDFILE", FILE_DELIVERY == "x-sendfile")  # private uploads, see utils/file_delivery.py
+
+    with profile.stage("extensions"):
+        from utils import assets, query_metrics, responsive_images, template_cache
+
+        mail.init_app(app)
+        template_cache.init_app(app)
+        assets.init_app(app)
+        responsive_images.init_app(app)
+        limiter.init_app(app)
+        query_metrics.init_app(app)
+        login_manager.init_app(app)
+
+    enabled = app.config["BLUEPRINTS"]
+    for name, module_name, attribute, url_prefix in BLUEPRINTS:
+        if enabled is not None and name not in enabled:
+            continue
+        with profile.stage(f"blueprint:{name}"):
+            blueprint = getattr(import_module(module_name), attribute)
+            app.register_blueprint(blueprint, url_prefix=url_prefix)
+
+    with profile.stage("rate limits"):
+        apply_route_limits(app, limiter)
+
+    if app.config["OAUTH_LOGIN"]:
+        with profile.stage("oauth"):
+            register_oauth(app)
+
+    with profile.stage("core routes"):
+        register_core_routes(app)
+        register_commands(app)
+
+    if os.getenv("ENSURE_INDEXES_ON_STARTUP", "false").lower() == "true":
+        with profile.stage("ensure indexes"):
+            from utils.indexes import ensure_indexes
+            ensure_indexes(db)
+
+    # Pre-render the public pages so the first real visitors after a deploy do not pay for
+    # template compilation. Without --preload, gunicorn runs this in every worker before it serves.
+    if os.getenv("WARM_UP_ON_STARTUP", "false").lower() == "true":
+        with profile.stage("warm up"):
+            template_cache.warm_up(app)
+
+    app.extensions["boot_profile"] = profile
+    if os.getenv("BOOT_PROFILE", "false").lower() == "true":
+        app.logger.warning("Boot profile:\n%s", profile.report())
+    return app
+
 
 @login_manager.user_loader
 def load_user(user_id):
-    user_doc = db.users.find_one({"_id": ObjectId(user_id)})
+    from models.user import User
+    from utils.user_cache import load_session_user
+
+    user_doc = load_session_user(user_id)
     return User(user_doc) if user_doc else None
-    
-# Google OAuth Blueprint
-google_bp = make_google_blueprint(
-    client_id=os.getenv("GOOGLE_OAUTH_CLIENT_ID"),
-    client_secret=os.getenv("GOOGLE_OAUTH_CLIENT_SECRET"),
-    scope=["profile", "email"],
-    redirect_url="/google-callback"
-)
-app.register_blueprint(google_bp, url_prefix="/login")
 
-app.config['MAX_CONTENT_LENGTH'] = 5 * 1024 * 1024  # 5MB max file size
 
-# Facebook OAuth Blueprint
-facebook_bp = make_facebook_blueprint(
-    client_id=os.getenv("FACEBOOK_OAUTH_CLIENT_ID"),
-    client_secret=os.getenv("FACEBOOK_OAUTH_CLIENT_SECRET"),
-    redirect_url="/facebook-callback"
-)
-app.register_blueprint(facebook_bp, url_prefix="/login")
+def register_oauth(app):
+    from flask_dance.contrib.google import make_google_blueprint
+    from flask_dance.contrib.facebook import make_facebook_blueprint
 
-@app.errorhandler(400)
-def bad_request_error(error):
-    """
-    Handle 400 Bad Request errors with specific messages if possible.
-    """
-    # Try to get custom error description if available
-    error_description = getattr(error, 'description', None)
-
-    return render_template('400.html', error_description=error_description), 400
-
-@app.errorhandler(500)
-def internal_error(error):
-    # (Optional) Log the error if you want
-    app.logger.error(f"Server Error: {error}")
-    return render_template('500.html'), 500
-
-# Home and static pages
-@app.route("/")
-def home():
-    social_photos = db.photos.find({"approved": True})
-    return render_template("home.html", social_photos=social_photos)
-
-@app.route("/about")
-def about():
-    return render_template("about.html")
-
-@app.route("/contact", methods=["GET"])
-def contact():
-    return render_template("contact.html")
-
-@app.route("/contact", methods=["POST"])
-def contact_submit():
-    from datetime import datetime
-    db.messages.insert_one({
-        "name": sanitize_input(request.form["name"]),
-        "email": sanitize_input(request.form["email"]),
-        "message": sanitize_input(request.form["message"]),
-        "timestamp": datetime.utcnow()
-    })
-    flash("Message sent.")
-    return redirect(url_for("contact"))
-
-@app.route("/privacy", methods=["GET"])
-def privacy():
-    return render_template("privacy.html")
-
-@app.context_processor
-def inject_cart_count():
-
-    if current_user.is_authenticated:
-        cart_count = db.cart.count_documents({
-            "user_id": current_user.id,
-            "status": "pending"  # Only show pending items
+    # Google OAuth Blueprint
+    google_bp = make_google_blueprint(
+        client_id=os.getenv("GOOGLE_OAUTH_CLIENT_ID"),
+        client_secret=os.getenv("GOOGLE_OAUTH_CLIENT_SECRET"),
+        scope=["profile", "email"],
+        redirect_url="/google-callback"
+    )
+    app.register_blueprint(google_bp, url_prefix="/login")
+
+    # Facebook OAuth Blueprint
+    facebook_bp = make_facebook_blueprint(
+        client_id=os.getenv("FACEBOOK_OAUTH_CLIENT_ID"),
+        client_secret=os.getenv("FACEBOOK_OAUTH_CLIENT_SECRET"),
+        redirect_url="/facebook-callback"
+    )
+    app.register_blueprint(facebook_bp, url_prefix="/login")
+
+
+def register_core_routes(app):
+    from utils.security import sanitize_input
+
+    @app.errorhandler(400)
+    def bad_request_error(error):
+        """
+        Handle 400 Bad Request errors with specific messages if possible.
+        """
+        # Try to get custom error description if available
+        error_description = getattr(error, 'description', None)
+
+        return render_template('400.html', error_description=error_description), 400
+
+    @app.errorhandler(500)
+    def internal_error(error):
+        # (Optional) Log the error if you want
+        app.logger.error(f"Server Error: {error}")
+        return render_template('500.html'), 500
+
+    # Home and static pages
+    @app.route("/")
+    def home():
+        social_photos = db.photos.find({"approved": True}, {"url": 1, "caption": 1, "responsive": 1})
+        return render_template("home.html", social_photos=social_photos)
+
+    @app.route("/about")
+    def about():
+        return render_template("about.html")
+
+    @app.route("/contact", methods=["GET"])
+    def contact():
+        return render_template("contact.html")
+
+    @app.route("/contact", methods=["POST"])
+    def contact_submit():
+        from datetime import datetime
+        db.messages.insert_one({
+            "name": sanitize_input(request.form["name"]),
+            "email": sanitize_input(request.form["email"]),
+            "message": sanitize_input(request.form["message"]),
+            "timestamp": datetime.utcnow()
         })
-    else:
-        cart_count = 0
+        flash("Message sent.")
+        return redirect(url_for("contact"))
+
+    @app.route("/privacy", methods=["GET"])
+    def privacy():
+        return render_template("privacy.html")
+
+    @app.context_processor
+    def inject_cart_count():
+
+        if current_user.is_authenticated:
+            cart_count = db.cart.count_documents({
+                "user_id": current_user.id,
+                "status": "pending"  # Only show pending items
+            })
+        else:
+            cart_count = 0
+
+        return dict(cart_count=cart_count)
+
+
+def register_commands(app):
+    # Index management: `flask ensure-indexes` on deploy, `flask index-advisor` to check query plans
+    @app.cli.command("ensure-indexes")
+    def ensure_indexes_command():
+        """Create the indexes registered in utils/indexes.py."""
+        from utils.indexes import ensure_indexes
+        for collection, result in ensure_indexes(db).items():
+            print(f"{collection}: {result}")
+
+    @app.cli.command("index-advisor")
+    def index_advisor_command():
+        """Explain the app's query shapes and flag collection scans."""
+        from utils.indexes import advise
+        for row in advise(db):
+            print(f"{row['verdict']:<16} {row['endpoint']:<40} {row['collection']} {row['filter']}")
+
+    # Retention: `flask apply-retention` on deploy, `flask retention-rollup` daily (cron)
+    @app.cli.command("apply-retention")
+    def apply_retention_command():
+        """Create the TTL indexes and capped collections in utils/retention.py."""
+        from utils.retention import apply_retention
+        for collection, statuses in apply_retention(db).items():
+            print(f"{collection}: {', '.join(statuses)}")
+
+    @app.cli.command("retention-rollup")
+    def retention_rollup_command():
+        """Roll up unanswered questions into daily per-cluster counts."""
+        from utils.retention import rollup_unanswered
+        rollup_unanswered(db)
+
+    @app.cli.command("migrate-tour-dates")
+    @click.option("--batch-size", default=500, show_default=True, help="Documents per bulk_write.")
+    @click.option("--throttle", default=0.0, show_default=True, help="Seconds to pause between batches.")
+    def migrate_tour_dates_command(batch_size, throttle):
+        """Convert string tour_instances.date values to BSON dates (resumable)."""
+        from utils.tour_dates import migrate_tour_dates
+        migrate_tour_dates(db, batch_size=batch_size, throttle=throttle)
+
+    @app.cli.command("build-images")
+    @click.option("--workers", default=2, show_default=True, help="Resize processes.")
+    @click.option("--rebuild", is_flag=True, help="Rebuild photos that already have variants.")
+    def build_images_command(workers, rebuild):
+        """Build WebP/AVIF width variants for static images and approved photos."""
+        from utils.responsive_images import build_static_variants, build_photo_variants
+        build_static_variants(app.static_folder, workers=workers)
+        build_photo_variants(db, app.static_folder, workers=workers, rebuild=rebuild)
+
+    @app.cli.command("build-assets")
+    def build_assets_command():
+        """Fingerprint and precompress templates/static into templates/static/dist."""
+        from utils.assets import build_assets
+        build_assets(app.static_folder)
+
+    @app.cli.command("precompile-templates")
+    def precompile_templates_command():
+        """Compile every template into the bytecode cache (TEMPLATE_CACHE_DIR)."""
+        from utils.template_cache import precompile_templates
+        if precompile_templates(app):
+            raise SystemExit(1)
+
+    @app.cli.command("archive-tours")
+    @click.option("--grace-days", default=30, show_default=True, help="Archive tours this many days after their date.")
+    @click.option("--batch-size", default=100, show_default=True, help="Tours per batch.")
+    @click.option("--throttle", default=0.0, show_default=True, help="Seconds to pause between batches.")
+    def archive_tours_command(grace_days, batch_size, throttle):
+        """Move past tours, their reservations and cart rows to the archive collections."""
+        from utils.archive import archive_past_tours
+        archive_past_tours(db, grace_days=grace_days, batch_size=batch_size, throttle=throttle)
+
+    @app.cli.command("mail-worker")
+    @click.option("--once", is_flag=True, help="Exit when the queue is empty instead of polling.")
+    def mail_worker_command(once):
+        """Send queued email over pooled SMTP sessions."""
+        from utils.mail_queue import MailWorker
+        MailWorker(app).run(once=once)
+
+    @app.cli.command("smtp-sink")
+    @click.option("--host", default="localhost", show_default=True)
+    @click.option("--port", default=1025, show_default=True)
+    @click.option("--directory", default=None, help="Also write each message here as an .eml file.")
+    def smtp_sink_command(host, port, directory):
+        """Accept and print mail locally instead of sending it (MAIL_SERVER=localhost, MAIL_PORT=1025)."""
+        from utils.smtp_sink import SMTPSink
+        print(f"📧 SMTP sink listening on {host}:{port}")
+        SMTPSink(host, port, directory=directory, echo=True).serve_forever()
+
+    @app.cli.command("boot-profile")
+    def boot_profile_command():
+        """Show how long each create_app stage took."""
+        print(app.extensions["boot_profile"].report())
 
-    return dict(cart_count=cart_count)
 
 if __name__ == "__main__":
-    app.run(debug=True)
+    create_app().run(debug=True)
@@ -6,8 +6,10 @@ from flask import Blueprint, current_app as app, render_template, redirect, url_
 from flask_login import login_user, logout_user, login_required, current_user
 from itsdangerous import URLSafeTimedSerializer, SignatureExpired, BadSignature
 from models.user import User
+from utils.archive import reservation_history
 from utils.email_verification import send_reset_email, get_serializer
 from utils.security import generate_secure_passphrase, handle_exception, sanitize_for_json, sanitize_input
+from utils.user_cache import invalidate_user, invalidate_user_by_email
 from werkzeug.security import generate_password_hash, check_password_hash
 import re, uuid
 
@@ -51,6 +53,7 @@ def activate_account(token):
             {"_id": ObjectId(student_id)},
             {"$set": {"status": "active", "activated_at": datetime.utcnow()}}
         )
+        invalidate_user(student_id)
 
         flash("Your account is now active! Please log in to complete your profile.", "success")
         return redirect(url_for('auth.login'))
@@ -116,17 +119,7 @@ def dashboard():
                 "student_photo_uploaded": student_photo_uploaded
             }
 
-            reservations = list(db.reservations.aggregate([
-                {"$match": {"parent_id": user_id}},
-                {"$lookup": {
-                    "from": "tour_instances",
-                    "localField": "tour_id",
-                    "foreignField": "_id",
-                    "as": "tour"
-                }},
-                {"$unwind": "$tour"},
-                {"$sort": {"tour.date": 1}}
-            ]))
+            reservations = reservation_history(db, {"parent_id": user_id})
             if role == "parent":
                 return  render_template("dashboards/parent.html", reservations=reservations, dashboard=dashboard)
 
@@ -197,6 +190,7 @@ def signup():
 @login_required
 def logout():
     try:
+        invalidate_user(current_user.id)
         logout_user()
         flash("Logged out successfully.", "success")
         return redirect(url_for("auth.login"))
@@ -287,6 +281,7 @@ def reset_password(token):
         if request.method == "POST":
             new_password = generate_password_hash(sanitize_input(request.form.get("password")))
             db.users.update_one({"email": email}, {"$set": {"password": new_password}})
+            invalidate_user_by_email(email)
             flash("Password updated successfully. Please log in.", "success")
             return redirect(url_for("auth.login"))
 
@@ -2,7 +2,9 @@
 from flask import Blueprint, redirect, render_template, url_for
 from flask_login import login_required, current_user
 from extensions import db, mail, serializer
+from models.tour import TourInstance
 from utils.security import handle_exception, role_required
+from utils.tour_dates import upcoming_tours_filter
 from bson.objectid import ObjectId
 from datetime import datetime
 
@@ -14,10 +16,10 @@ driver_bp = Blueprint("driver", __name__)
 def driver_panel():
     try:
         # Retrieve upcoming tours assigned to the current driver
-        tours = list(db.tour_instances.find({
+        tours = list(TourInstance.find({
             "driver_id": ObjectId(current_user.get_id()),
-            "date": {"$gte": datetime.utcnow()}
-        }).sort("date", 1))
+            **upcoming_tours_filter()
+        }, sort=[("date", 1)]))
 
         return render_template("dashboards/driver.html", tours=tours)
     except Exception as e:
@@ -1,6 +1,9 @@
 # extensions.py
 from flask_mail import Mail
-from pymongo import MongoClient
+from utils.identity_map import IdentityMapInvalidator
+from utils.mongo import LazyProxy, MongoConnectionManager
+from utils.query_metrics import QueryMetricsListener
+from utils.slow_queries import SlowQueryListener
 from itsdangerous import URLSafeTimedSerializer
 import os
 
@@ -11,5 +14,9 @@ serializer = URLSafeTimedSerializer(os.getenv("SECRET_KEY"))
 # MongoDB setup
 ENV = os.getenv("FLASK_ENV", "development")
 MONGO_URI = os.getenv("MONGO_URI_PROD") if ENV == "production" else os.getenv("MONGO_URI_DEV")
-client = MongoClient(MONGO_URI)
-db = client["college_bound"]
\ No newline at end of file
+
+# The client is created on first use in each process (see utils/mongo.py), so importing
+# this module in a preforking master does not hand one connection pool to every worker.
+mongo = MongoConnectionManager(MONGO_URI, "college_bound", event_listeners=[QueryMetricsListener(), SlowQueryListener(), IdentityMapInvalidator()])
+client = LazyProxy(mongo.get_client)
+db = LazyProxy(mongo.get_db)
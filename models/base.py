@@ -0,0 +1,122 @@
+# models/base.py
+from extensions import db
+
+
+_UNLOADED = object()
+
+
+class LazyField:
+    """
+    Sub-document that is left out of the model's projection and fetched
+    from Mongo the first time it is read (e.g. User.profile).
+    """
+
+    def __init__(self, default=None):
+        self.default = default
+        self.name = None
+        self.slot = None
+
+    def __set_name__(self, owner, name):
+        self.name = name
+        self.slot = f"_{name}"
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        value = getattr(obj, self.slot, _UNLOADED)
+        if value is _UNLOADED:
+            default = self.default() if callable(self.default) else self.default
+            value = obj._fetch_field(self.name, default)
+            setattr(obj, self.slot, value)
+        return value
+
+    def __set__(self, obj, value):
+        setattr(obj, self.slot, value)
+
+
+class Model:
+    """
+    Small base for the __slots__ models in this package.
+
+    Subclasses list the document keys they read in FIELDS (each one becomes a slot and
+    part of PROJECTION) and declare optional sub-documents as LazyField attributes,
+    which need a matching "_<name>" slot.
+    """
+
+    __slots__ = ("id",)
+
+    COLLECTION = None
+    FIELDS = ()
+    DEFAULTS = {}
+
+    def __init__(self, doc):
+        self.id = doc.get("_id")
+        for field in self.FIELDS:
+            setattr(self, field, doc.get(field, self.DEFAULTS.get(field)))
+        # Keep lazy sub-documents that the caller already fetched
+        for name in self.lazy_fields():
+            if name in doc:
+                setattr(self, f"_{name}", doc[name])
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.id}>"
+
+    @classmethod
+    def lazy_fields(cls):
+        return [name for klass in cls.__mro__ for name, value in vars(klass).items() if isinstance(value, LazyField)]
+
+    @classmethod
+    def projection(cls, *extra):
+        """Mongo projection for the eager fields, plus any lazy ones named in `extra`."""
+        projection = {field: 1 for field in cls.FIELDS}
+        projection.update({field: 1 for field in extra})
+        return projection
+
+    @classmethod
+    def from_doc(cls, doc):
+        return cls(doc) if doc else None
+
+    @classmethod
+    def find_one(cls, filter, *extra):
+        return cls.from_doc(db[cls.COLLECTION].find_one(filter, cls.projection(*extra)))
+
+    @classmethod
+    def find(cls, filter=None, *extra, sort=None, limit=0):
+        cursor = db[cls.COLLECTION].find(filter or {}, cls.projection(*extra), limit=limit)
+        if sort:
+            cursor = cursor.sort(sort)
+        return (cls(doc) for doc in cursor)
+
+    def _fetch_field(self, name, default):
+        if self.id is None:
+            return default
+        doc = db[self.COLLECTION].find_one({"_id": self.id}, {name: 1}) or {}
+        return doc.get(name, default)
+
+    def to_doc(self, include_lazy=False):
+        """BSON-ready dict of the loaded fields. Lazy fields are only included once loaded."""
+        doc = {"_id": self.id} if self.id is not None else {}
+        for field in self.FIELDS:
+            value = getattr(self, field)
+            if value is not None:
+                doc[field] = value
+        if include_lazy:
+            for name in self.lazy_fields():
+                value = getattr(self, f"_{name}", _UNLOADED)
+                if value is not _UNLOADED:
+                    doc[name] = value
+        return doc
+
+    def get(self, key, default=None):
+        """dict-style access so code written against raw documents keeps working."""
+        if key == "_id":
+            return self.id
+        return getattr(self, key, default)
+
+    def __getitem__(self, key):
+        if key == "_id":
+            return self.id
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
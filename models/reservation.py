@@ -0,0 +1,15 @@
+# models/reservation.py
+from models.base import LazyField, Model
+
+
+class Reservation(Model):
+    """A student's seat on a tour instance (reservations collection)."""
+
+    __slots__ = ("user_id", "student_id", "parent_id", "tour_id", "status", "seat_status", "price", "parent_verified", "parent_email", "last_consent_resent", "timestamp", "added_at", "_reservation_data")
+
+    COLLECTION = "reservations"
+    FIELDS = ("user_id", "student_id", "parent_id", "tour_id", "status", "seat_status", "price", "parent_verified", "parent_email", "last_consent_resent", "timestamp", "added_at")
+    DEFAULTS = {"parent_verified": False}
+
+    # Snapshot of the tour taken when the cart item was created; large and rarely read
+    reservation_data = LazyField(default=dict)
@@ -0,0 +1,14 @@
+# models/school.py
+from models.base import LazyField, Model
+
+
+class University(Model):
+    """A campus that tours visit (universities collection)."""
+
+    __slots__ = ("name", "website", "type_ids", "_visitor_center_address")
+
+    COLLECTION = "universities"
+    FIELDS = ("name", "website", "type_ids")
+    DEFAULTS = {"type_ids": ()}
+
+    visitor_center_address = LazyField(default=dict)
@@ -0,0 +1,18 @@
+# models/tour.py
+from models.base import LazyField, Model
+
+
+class TourInstance(Model):
+    """A dated run of a tour template, stored in tour_instances."""
+
+    __slots__ = ("template_id", "title", "name", "date", "capacity", "registered", "university_names", "driver_id", "vehicle_id", "_university_ids")
+
+    COLLECTION = "tour_instances"
+    FIELDS = ("template_id", "title", "name", "date", "capacity", "registered", "university_names", "driver_id", "vehicle_id")
+    DEFAULTS = {"capacity": 13, "registered": 0}
+
+    university_ids = LazyField(default=list)
+
+    @property
+    def slots_available(self):
+        return int(self.capacity - self.registered)
@@ -1,22 +1,51 @@
 # models/user.py
-from bson.objectid import ObjectId
-from flask_login import UserMixin
-from datetime import datetime
-
-class User(UserMixin):
-    def __init__(self, user_doc):
-        self.id = user_doc.get("_id")
-        self.email = user_doc.get("email")
-        self.name = user_doc.get("name")
-        self.role = user_doc.get("role", "student")
-        self.password = user_doc.get("password")
-        self.profile_complete = user_doc.get("profile_complete", False)
-        self.profile = user_doc.get("profile", False)
-        self.created_at = datetime.now()
+from models.base import LazyField, Model
+
+
+class User(Model):
+    """
+    Logged-in user. Implements the Flask-Login user interface directly rather than
+    through UserMixin so instances keep __slots__ and carry no __dict__.
+    The password hash is never loaded into this object.
+    """
+
+    __slots__ = ("email", "name", "role", "profile_complete", "cell_phone", "text_opt_in", "status", "created_at", "_profile")
+
+    COLLECTION = "users"
+    FIELDS = ("email", "name", "role", "profile_complete", "cell_phone", "text_opt_in", "status", "created_at")
+    DEFAULTS = {"role": "student", "profile_complete": False}
+
+    # Only the checklist and profile pages need this; it is fetched on first access
+    profile = LazyField(default=False)
+
+    @property
+    def is_authenticated(self):
+        return True
+
+    @property
+    def is_active(self):
+        return True
+
+    @property
+    def is_anonymous(self):
+        return False
 
     def get_id(self):
         return self.id
 
+    def __eq__(self, other):
+        if isinstance(other, User):
+            return str(self.id) == str(other.id)
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __hash__(self):
+        # Must agree with __eq__: two objects for the same account hash alike
+        return hash(str(self.id))
+
     def is_admin(self):
         return self.role == "admin"
 
@@ -28,6 +57,6 @@ class User(UserMixin):
 
     def is_student(self):
         return self.role == "student"
-    
+
     def to_dict(self):
-        return self.__dict__
\ No newline at end of file
+        return self.to_doc(include_lazy=True)
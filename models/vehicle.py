@@ -1,5 +1,8 @@
+# models/vehicle.py
+"""
+Example vehicles document:
 
-"""[
+[
   {
   "vehicle_id": "VAN-001",
   "make": "Ford",
@@ -41,4 +44,19 @@
     }
   ],
   "status": "Active"
-]"""
\ No newline at end of file
+]"""
+
+from models.base import LazyField, Model
+
+
+class Vehicle(Model):
+    """A van in the fleet. Maintenance history is loaded only when it is read."""
+
+    __slots__ = ("vehicle_id", "make", "model", "year", "plate_number", "mileage", "last_service_date", "status", "_maintenance_schedule", "_upcoming_maintenance", "_maintenance_logs")
+
+    COLLECTION = "vehicles"
+    FIELDS = ("vehicle_id", "make", "model", "year", "plate_number", "mileage", "last_service_date", "status")
+
+    maintenance_schedule = LazyField(default=dict)
+    upcoming_maintenance = LazyField(default=list)
+    maintenance_logs = LazyField(default=list)
@@ -0,0 +1,17 @@
+# parent/forms.py
+from utils.forms import Checkbox, FormSchema, Phone, Text
+
+
+class ParentProfileForm(FormSchema):
+    name = Text(required=True, max_length=200)
+    cell_phone = Phone()
+    text_opt_in = Text(choices=("Yes", "No"), default="No")
+    maddress = Text(source="m_address", max_length=500)
+    baddress = Text(source="b_address", max_length=500)
+    emergency_contact = Text(required=True, max_length=200)
+    emergency_phone = Phone(required=True)
+    student_link = Text(required=True)
+    guardian_confirmation = Checkbox(required=True)
+    terms = Checkbox(required=True)
+    social_media = Text()
+    college_preferences = Text(max_length=1000)
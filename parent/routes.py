@@ -4,10 +4,13 @@ from extensions import db  # assuming you initialized db in an extensions.py
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_required, current_user
 from itsdangerous import URLSafeTimedSerializer, SignatureExpired, BadSignature
+from parent.forms import ParentProfileForm
 from extensions import db, mail, serializer
+from utils.guardian_consent import load_consent_token
 from utils.security import handle_exception, role_required, sanitize_input, validate_file, allowed_file, upload_to_gcs
+from utils.user_cache import invalidate_user
 from werkzeug.utils import secure_filename
-import os
+import os, uuid
 from datetime import datetime
 
 parent_bp = Blueprint("parent", __name__)
@@ -27,7 +30,7 @@ def parent_dashboard():
 @role_required("parent")
 def confirm_parent(token):
     try:
-        data = serializer.loads(token, max_age=3600)
+        data = load_consent_token(token)
         student_id = data.get("student_id")
         tour_id = data.get("tour_id")
         email = data.get("parent_email")
@@ -49,8 +52,13 @@ def confirm_parent(token):
             flash("A valid ID must be uploaded.", "warning")
             return redirect(request.url)
 
-        filename = secure_filename(file.filename)
+        # Uploads are create-only, so the object name must be unique: phones name every photo image.jpg
+        extension = os.path.splitext(secure_filename(file.filename))[1].lower()
+        filename = f"{student_id}_{tour_id}_{uuid.uuid4().hex}{extension}"
         gcs_url = upload_to_gcs(file, filename, folder="parent_ids")
+        if not isinstance(gcs_url, str):
+            flash("Your ID could not be uploaded. Please try again.", "danger")
+            return redirect(request.url)
 
         db.reservations.update_one(
             {"user_id": ObjectId(student_id), "tour_id": ObjectId(tour_id)},
@@ -59,7 +67,7 @@ def confirm_parent(token):
                 "parent_name": parent_name,
                 "parent_email": email,
                 "parent_id_url": gcs_url,
-                "confirmed_at": datetime.datetime.utcnow(),
+                "confirmed_at": datetime.utcnow(),
                 "signature": signature
             }}
         )
@@ -76,31 +84,22 @@ def parent_profile():
     tour_id = sanitize_input(request.args.get("tour_id")) or sanitize_input(request.form.get("tour_id"))
 
     if request.method == "POST":
-        required_data = {
-            "user_id": current_user.id,
-            "name": sanitize_input(request.form.get("name")),
-            "cell_phone": sanitize_input(request.form.get("cell_phone")),
-            "text_opt_in": sanitize_input(request.form.get("text_opt_in")),
-        }
-        profile_data = {
-            
-            "maddress": sanitize_input(request.form.get("m_address")),
-            "baddress": sanitize_input(request.form.get("b_address")),
-            "emergency_contact": sanitize_input(request.form.get("emergency_contact")),
-            "emergency_phone": sanitize_input(request.form.get("emergency_phone")),
-            "student_link": sanitize_input(request.form.get("student_link")),
-            "guardian_confirmation": sanitize_input(request.form.get("guardian_confirmation")),
-            "terms": sanitize_input(request.form.get("terms")),
-            "social_media": sanitize_input(request.form.get("social_media")),
-            "college_preferences": sanitize_input(request.form.get("college_preferences")),
-            "updated_at": datetime.utcnow()
-        }
-        
+        form_data, errors = ParentProfileForm.validate(request.form)
+        if errors:
+            for field, error in errors.items():
+                flash(f"{field.replace('_', ' ').capitalize()}: {error}", "danger")
+            return render_template("parent_profile.html", tour_id=tour_id)
+
+        # name, cell_phone and text_opt_in live on the user document; the rest on its profile
+        account_data = {field: form_data.pop(field) for field in ("name", "cell_phone", "text_opt_in")}
+        profile_data = {**form_data, "updated_at": datetime.utcnow()}
+
         updated_profile = db.users.update_one(
             {"_id": ObjectId(current_user.id)},
-            {"$set": {"name": required_data["name"], "cell_phone": required_data["cell_phone"], "text_opt_in": required_data["text_opt_in"], "profile": profile_data}},
+            {"$set": {**account_data, "profile": profile_data}},
             upsert=True
         )
+        invalidate_user(current_user.id)
         print(updated_profile)
 
         flash("Profile updated successfully.", "success")
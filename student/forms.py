@@ -0,0 +1,32 @@
+# student/forms.py
+from utils.forms import Date, Email, FormSchema, Integer, Phone, Text
+
+YES_NO = ("Yes", "No")
+
+
+class StudentProfileForm(FormSchema):
+    is_high_school_student = Text(required=True, choices=YES_NO)
+    current_school_year = Text()
+    current_grade_level = Text(required=True, choices=("Freshman", "Sophomore", "Junior", "Senior"))
+    new_first_time = Text()
+    first_name = Text(required=True, max_length=100)
+    middle_name = Text(max_length=100)
+    last_name = Text(required=True, max_length=100)
+    email = Email(required=True)
+    country = Text(default="United States")
+    street = Text(required=True)
+    city = Text(required=True, max_length=100)
+    state = Text(required=True, max_length=100)
+    postal_code = Text(required=True, max_length=20)
+    cell_phone = Phone()
+    text_opt_in = Text(choices=YES_NO, default="No")
+    gender = Text(choices=("Female", "Male"))
+    birthdate = Date(required=True)
+    graduation_year = Integer(minimum=1990, maximum=2100)
+    high_school_name = Text(required=True)
+    high_school_address = Text(required=True)
+    hs_city = Text(required=True, max_length=100)
+    hs_state = Text(required=True, max_length=100)
+    hs_postal_code = Text(required=True, max_length=20)
+    ceeb_code = Text(max_length=20)
+    academic_interest = Text()
@@ -2,7 +2,9 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_required, current_user
 from flask_mail import Message
+from student.forms import StudentProfileForm
 from utils.security import handle_exception, role_required, sanitize_input
+from utils.user_cache import invalidate_user
 from bson.objectid import ObjectId
 from datetime import datetime
 import os
@@ -57,40 +59,20 @@ def student_profile():
         tour_id = sanitize_input(request.args.get("tour_id")) or sanitize_input(request.form.get("tour_id"))
 
         if request.method == "POST":
-            student_data = {
-                "user_id": current_user.id,
-                "is_high_school_student": sanitize_input(request.form.get("is_high_school_student")),
-                "current_school_year": sanitize_input(request.form.get("current_school_year")),
-                "new_first_time": sanitize_input(request.form.get("new_first_time")),
-                "first_name": sanitize_input(request.form.get("first_name")),
-                "middle_name": sanitize_input(request.form.get("middle_name")),
-                "last_name": sanitize_input(request.form.get("last_name")),
-                "email": sanitize_input(request.form.get("email")),
-                "country": sanitize_input(request.form.get("country")),
-                "street": sanitize_input(request.form.get("street")),
-                "city": sanitize_input(request.form.get("city")),
-                "state": sanitize_input(request.form.get("state")),
-                "postal_code": sanitize_input(request.form.get("postal_code")),
-                "cell_phone": sanitize_input(request.form.get("cell_phone")),
-                "text_opt_in": sanitize_input(request.form.get("text_opt_in")),
-                "gender": sanitize_input(request.form.get("gender")),
-                "birthdate": sanitize_input(request.form.get("birthdate")),
-                "graduation_year": sanitize_input(request.form.get("graduation_year")),
-                "high_school_name": sanitize_input(request.form.get("high_school_name")),
-                "high_school_address": sanitize_input(request.form.get("high_school_address")),
-                "hs_city": sanitize_input(request.form.get("hs_city")),
-                "hs_state": sanitize_input(request.form.get("hs_state")),
-                "hs_postal_code": sanitize_input(request.form.get("hs_postal_code")),
-                "ceeb_code": sanitize_input(request.form.get("ceeb_code")),
-                "academic_interest": sanitize_input(request.form.get("academic_interest")),
-                "updated_at": datetime.utcnow()
-            }
-            
+            student_data, errors = StudentProfileForm.validate(request.form)
+            if errors:
+                for field, error in errors.items():
+                    flash(f"{field.replace('_', ' ').capitalize()}: {error}", "danger")
+                return render_template("student_profile.html", student=student_data, tour_id=tour_id, is_editable=True)
+            student_data["user_id"] = current_user.id
+            student_data["updated_at"] = datetime.utcnow()
+
             updated_profile = db.users.update_one(
                 {"_id": ObjectId(current_user.id)},
                 {"$set": {"profile": student_data}},
                 upsert=True
             )
+            invalidate_user(current_user.id)
             print(updated_profile)
 
             flash("Profile updated successfully.")
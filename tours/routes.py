@@ -8,7 +8,14 @@ from flask import Blueprint, jsonify, render_template, request, redirect, url_fo
 from flask_login import login_required, current_user
 from student.routes import generate_parent_token, send_parent_consent_email
 from extensions import db, mail, serializer
+from utils.archive import reservation_history
+from utils.identity_map import get_document, get_documents
+from utils.mail_queue import enqueue_email
+from utils.previews import schedule_previews
 from utils.security import allowed_file, handle_exception, role_required, safe_get_parameter, safe_get_parameter_list, sanitize_for_json, sanitize_input, scan_file_for_viruses, upload_to_gcs, validate_file
+from utils.storage import upload_many
+from utils.tour_dates import format_tour_date, upcoming_tours_filter
+from utils.user_cache import invalidate_user
 from werkzeug.utils import secure_filename
 import os, json, socket, tempfile
 
@@ -235,7 +242,7 @@ def get_linked_parent(student_user_id):
 
 def get_number_of_slots_available(tour_id):
     try:
-        tour_info = db.tour_instances.find_one({"_id": tour_id})
+        tour_info = get_document("tour_instances", tour_id)
         if tour_info:
             capacity = tour_info["capacity"]
             registered = tour_info["registered"]
@@ -252,7 +259,7 @@ def get_student_name(student_id):
     Fetch student's name for displaying on consent form.
     """
     try:
-        student = db.users.find_one({"_id": ObjectId(student_id)})
+        student = get_document("users", ObjectId(student_id))
         return student.get("name", "Unknown Student")
     except Exception as e:
         handle_exception(e)
@@ -263,7 +270,7 @@ def get_tour_name(tour_id):
     Fetch tour's name for displaying on consent form.
     """
     try:
-        tour = db.tour_instances.find_one({"_id": tour_id})
+        tour = get_document("tour_instances", tour_id)
         return tour.get("name", "Unknown Tour")
     except Exception as e:
         handle_exception(e)
@@ -547,7 +554,7 @@ def has_valid_photo_id(user_id, tour_id):
         bool: True if a valid photo ID file exists, False otherwise.
     """
     try:
-        user = db.users.find_one({"_id": ObjectId(user_id)})
+        user = get_document("users", ObjectId(user_id))
 
         if not user:
             return False
@@ -653,7 +660,7 @@ def has_valid_student_id(user_id):
     """
     try:
         # Step 1: Get user's profile
-        user = db.users.find_one({"_id": ObjectId(user_id)})
+        user = get_document("users", ObjectId(user_id))
         if not user:
             return False
 
@@ -712,10 +719,7 @@ def send_email(to_email, subject, body):
         body (str): Email body text
     """
     try:
-        # You can implement using Flask-Mail, SendGrid, SMTP, etc.
-        print(f"Sending email to {to_email}")
-        print(f"Subject: {subject}")
-        print(f"Body: {body}")
+        enqueue_email(to_email, subject, body)
     except Exception as e:
         handle_exception(e)
         raise
@@ -758,15 +762,19 @@ def test_file(file, file_title):
                 f"profile.{file_title.replace(' ', '_').lower()}_time": datetime.now()
             }}
         )
+        invalidate_user(current_user.id)
 
-        return True
+        # Reviewers look at downscaled copies; build them off the request thread
+        schedule_previews(str(current_user.id), file_title.replace(' ', '_').lower(), save_path)
+
+        return save_path
     except Exception as e:
         handle_exception(e)
         raise
 
 def waitlist_parent(wait_list_id, wait_list_role):
     try:
-        status = db.temporary_selection.update_one({f"{wait_list_role}_id":wait_list_id}, {$set: {"status": "waitlist"}})
+        status = db.temporary_selection.update_one({f"{wait_list_role}_id":wait_list_id}, {"$set": {"status": "waitlist"}})
         return status
     except Exception as e:
         handle_exception(e)
@@ -832,7 +840,7 @@ def delete_photo_id():
         tour_id = safe_get_parameter("tour_id")
 
         # Fetch student ID file path
-        user = db.users.find_one({"_id": ObjectId(current_user.id)})
+        user = get_document("users", ObjectId(current_user.id))
         photo_id_file = user.get("profile", {}).get("photo_id_file")
 
         # Delete file if it exists
@@ -844,6 +852,7 @@ def delete_photo_id():
             {"_id": ObjectId(current_user.id)},
             {"$unset": {"profile.photo_id_file": "", "profile.photo_id_approval": ""}}
         )
+        invalidate_user(current_user.id)
 
         flash("Photo ID deleted successfully. You may upload a new one.", "success")
         return redirect(url_for('tours.upload_photo_id'), tour_id=tour_id)
@@ -1031,6 +1040,7 @@ def parent_fill_student_profile():
                 "profile_completed_at": datetime.utcnow()
             }}
         )
+        invalidate_user(student_id)
 
         flash("Student profile updated successfully!", "success")
         return redirect(url_for("tours.tour_checklist", tour_id=safe_get_parameter("tour_id")))
@@ -1117,6 +1127,7 @@ def student_fill_profile_later():
                 "profile_complete": False
             }}
         )
+        invalidate_user(sid)
 
     flash("Student(s) can log in to complete their profile before attending a tour.", "info")
     return redirect(url_for("tours.tour_checklist", tour_id=tour_id))
@@ -1125,14 +1136,9 @@ def student_fill_profile_later():
 @tours_bp.route("/schedule")
 def tour_schedule():
     try:
-        current_date = datetime.now()
-        formatted_date = current_date.strftime("%Y-%m-%d")
-        upcoming_tours = list(db.tour_instances.find({
-            "date": {"$gte": formatted_date}
-        }).sort("date", 1))
+        upcoming_tours = list(db.tour_instances.find(upcoming_tours_filter()).sort("date", 1))
         for upcoming_tour in upcoming_tours:
-            updated_date = str(upcoming_tour["date"]).split("T", 1)
-            upcoming_tour["date"] = updated_date[0]
+            upcoming_tour["date"] = format_tour_date(upcoming_tour["date"])
         initial_date = upcoming_tours[0]["date"]
         return render_template("tour_schedule.html", tours=upcoming_tours, initial_date=initial_date)
     except Exception as e:
@@ -1145,11 +1151,11 @@ def tour_schedule():
 def reserve_tour(tour_id):
     try:
         user_id = current_user.get_id()
-        complete_profile = db.users.find_one({"_id": ObjectId(user_id), "profile": {"$exists": True}})
-        if not complete_profile:
+        student_profile = get_document("users", ObjectId(user_id)) or {}
+        if "profile" not in student_profile:
             return redirect(url_for("auth.profile", tour_id=tour_id))
         
-        tour = db.tour_instances.find_one({"_id": tour_id})
+        tour = get_document("tour_instances", tour_id)
 
         if not tour:
             flash("Tour not found.", "danger")
@@ -1164,8 +1170,6 @@ def reserve_tour(tour_id):
         registered = tour.get("registered", 0)
         status = "Confirmed" if registered < capacity else "Waitlisted"
 
-        student_profile = db.users.find_one({"_id": ObjectId(user_id)}) or {}
-
         # After checking age < 18 and before finalizing reservation
         if student_profile.get("age", 0) < 18:
             token = generate_parent_token(user_id, tour_id, student_profile.get("parent_email"))
@@ -1204,10 +1208,8 @@ def sign_consent(student_id, tour_id):
             tour_id = safe_get_parameter("tour_id")
 
         if request.method == "GET":
-            tour_instance = db.tour_instances.find_one({"_id": tour_id})
-            print(f'tour_instance["date"]: {tour_instance["date"]}')
-            tour_date_raw = datetime.fromisoformat(tour_instance["date"])
-            tour_date_formatted = tour_date_raw.strftime("%B %d, %Y")
+            tour_instance = get_document("tour_instances", tour_id)
+            tour_date_formatted = format_tour_date(tour_instance["date"], "%B %d, %Y")
             # If GET, show the form
             print(student_id)
             student_name = get_student_name(student_id)
@@ -1280,30 +1282,34 @@ def submit_background_check():
 @tours_bp.route("/tour/<tour_id>")
 def tour_details(tour_id):
     try:
-        tour = db.tour_instances.find_one({"_id": tour_id})
+        tour = get_document("tour_instances", tour_id)
         #tour["date"] = tour["date"].strftime(") datetime.strptime(date_string, "%m-%d-%Y).date()
         if not tour:
             flash("Tour not found.", "danger")
             return redirect(url_for("tours.tour_schedule"))
         
         if "template_id" in tour:
-            template = db.tour_templates.find_one({"_id": tour["template_id"]})
+            template = get_document("tour_templates", tour["template_id"])
             #print(f"template: {template}")
         # Fetch university details
         university_list = []
         if "university_ids" in template:
-            for univeristy_id in template["university_ids"]:
-                type_list = []
-                university = db.universities.find_one({"_id": ObjectId(univeristy_id)}) or {}
-                print(f"university: {university}")
-                
-                if university:                
-                    for type_id in university["type_ids"]:
-                        type = db.university_types.find_one({"_id": type_id}) or {}
-                        type_list.append(type["label"])
-                    university["types"] = type_list
-                    university_list.append(university)        
+            university_ids = [ObjectId(university_id) for university_id in template["university_ids"]]
+            universities = get_documents("universities", university_ids)
+            type_ids = [type_id for university in universities.values() for type_id in university.get("type_ids", [])]
+            university_types = get_documents("university_types", type_ids, {"label": 1})
+
+            for university_id in university_ids:
+                university = universities.get(university_id)
+                if university:
+                    # A copy: get_documents returns the identity map's shared documents
+                    university_list.append({
+                        **university,
+                        "types": [university_types[type_id]["label"] for type_id in university.get("type_ids", []) if type_id in university_types],
+                    })
 
+        # Copied rather than edited in place: get_document returns the identity map's shared document
+        tour = {**tour, "date": format_tour_date(tour.get("date"), "%B %d, %Y")}
         return render_template("tour_details.html", tour=tour, universities=university_list, template=template)
     except Exception as e:
         handle_exception(e)
@@ -1334,19 +1340,8 @@ def tour_checklist():
 @login_required
 def my_reservations():
     try:
-        pipeline = [
-            {"$match": {"user_id": current_user.get_id()}},
-            {"$lookup": {
-                "from": "tour_instances",
-                "localField": "tour_id",
-                "foreignField": "_id",
-                "as": "tour"
-            }},
-            {"$unwind": "$tour"},
-            {"$sort": {"tour.date": 1}}
-        ]
-        reservations = db.reservations.aggregate(pipeline)
-        return render_template("my_reservations.html", reservations=reservations)
+        history = reservation_history(db, {"user_id": current_user.get_id()})
+        return render_template("my_reservations.html", history=history)
     except Exception as e:
         handle_exception(e)
         return redirect(url_for('home'))
@@ -1370,6 +1365,7 @@ def complete_profile():
                     "profile_complete": True
                 }}
             )
+            invalidate_user(current_user.get_id())
             flash("Profile updated.", "success")
             return redirect(url_for("tours.tour_schedule"))
 
@@ -1396,7 +1392,7 @@ def choose_alternatives(tour_id):
 
         available = db.tour_instances.find({
             "_id": {"$ne": ObjectId(tour_id)},
-            "date": {"$gte": datetime.now()}
+            **upcoming_tours_filter()
         }).sort("date", 1)
         return render_template("choose_alternatives.html", tour_id=tour_id, alternatives=available)
     except Exception as e:
@@ -1417,6 +1413,23 @@ def upload_photo_id():
             if front_id_status == False or back_id_status == False:
                 return redirect(request.url)
 
+            # Both sides go to the bucket in parallel; the local files stay the reviewers' copies
+            try:
+                with open(front_id_status, "rb") as front_file, open(back_id_status, "rb") as back_file:
+                    front_url, back_url = upload_many(
+                        [(front_file, os.path.basename(front_id_status)), (back_file, os.path.basename(back_id_status))],
+                        folder=f"photo_ids/{current_user.id}",
+                    )
+            except Exception as e:
+                handle_exception(e)
+                flash("Your ID could not be stored. Please try again.", "danger")
+                return redirect(request.url)
+            db.users.update_one(
+                {"_id": ObjectId(current_user.id)},
+                {"$set": {"profile.front_of_id_object": front_url, "profile.back_of_id_object": back_url}}
+            )
+            invalidate_user(current_user.id)
+
             flash("Photo ID uploaded successfully. An admin will review for approval.", "success")
             return redirect(url_for('tours.tour_checklist'))
         
@@ -0,0 +1,101 @@
+# utils/archive.py
+from datetime import datetime, timedelta
+from pymongo import ReplaceOne
+from utils.joins import lookup_by_id
+from utils.tour_dates import tour_date_filter
+import os, time
+
+
+# Tours are archived this many days after their date, with their reservations and cart rows
+ARCHIVE_GRACE_DAYS = int(os.getenv("ARCHIVE_GRACE_DAYS", "30"))
+ARCHIVED = {
+    "tour_instances": "tour_instances_archive",
+    "reservations": "reservations_archive",
+    "cart": "cart_archive",
+}
+
+
+def _copy(db, collection, documents, archived_at):
+    """Upsert by _id, so a batch interrupted between copy and delete can simply be rerun."""
+    if not documents:
+        return 0
+    operations = [ReplaceOne({"_id": document["_id"]}, {**document, "archived_at": archived_at}, upsert=True) for document in documents]
+    db[ARCHIVED[collection]].bulk_write(operations, ordered=False)
+    return len(documents)
+
+
+def archive_past_tours(db, grace_days=ARCHIVE_GRACE_DAYS, batch_size=100, throttle=0.0, now=None, progress=print):
+    """
+    Move tours that ended more than grace_days ago into the *_archive collections,
+    together with their reservations and cart rows, one batch of tours at a time.
+
+    Each batch is copied before it is deleted, and copies are idempotent upserts, so an
+    interrupted run loses nothing and the next run finishes the batch.
+
+    Returns:
+        dict: Counts moved per collection.
+    """
+    cutoff = (now or datetime.utcnow()) - timedelta(days=grace_days)
+    moved = {collection: 0 for collection in ARCHIVED}
+
+    while True:
+        # Each batch is deleted before the next query, so no _id cursor is needed (one
+        # would stop at the first _id type, since $gt only compares within a BSON type)
+        tours = list(db.tour_instances.find(tour_date_filter(end=cutoff)).sort("_id", 1).limit(batch_size))
+        if not tours:
+            break
+
+        # Reservations and cart rows hold tour_id as a string in most code paths
+        tour_ids = [tour["_id"] for tour in tours]
+        related = {"tour_id": {"$in": tour_ids + [str(_id) for _id in tour_ids]}}
+        reservations = list(db.reservations.find(related))
+        cart = list(db.cart.find(related))
+
+        archived_at = datetime.utcnow()
+        moved["reservations"] += _copy(db, "reservations", reservations, archived_at)
+        moved["cart"] += _copy(db, "cart", cart, archived_at)
+        moved["tour_instances"] += _copy(db, "tour_instances", tours, archived_at)
+
+        # Children first, so a live tour never points at archived-only reservations
+        db.reservations.delete_many({"_id": {"$in": [document["_id"] for document in reservations]}})
+        db.cart.delete_many({"_id": {"$in": [document["_id"] for document in cart]}})
+        db.tour_instances.delete_many({"_id": {"$in": tour_ids}})
+
+        progress(f"archived {moved['tour_instances']} tours, {moved['reservations']} reservations, {moved['cart']} cart rows")
+        if throttle:
+            time.sleep(throttle)
+
+    return moved
+
+
+def _with_tour(tours_collection):
+    return [
+        *lookup_by_id(tours_collection, "tour_id", "tour"),
+        {"$unwind": "$tour"},
+    ]
+
+
+def reservation_history(db, match):
+    """
+    A user's reservations joined to their tours, live and archived, oldest tour first.
+    One aggregation: the archived half is appended with $unionWith and marked archived=True.
+
+    Args:
+        match (dict): Reservation filter, e.g. {"user_id": ...} or {"parent_id": ...}.
+
+    Returns:
+        list of dicts
+    """
+    return list(db.reservations.aggregate([
+        {"$match": match},
+        *_with_tour("tour_instances"),
+        {"$unionWith": {
+            "coll": ARCHIVED["reservations"],
+            "pipeline": [
+                {"$match": match},
+                *_with_tour(ARCHIVED["tour_instances"]),
+                {"$set": {"archived": True}},
+            ],
+        }},
+        {"$sort": {"tour.date": 1}},
+    ]))
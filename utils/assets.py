@@ -0,0 +1,112 @@
+# utils/assets.py
+from flask import request, send_from_directory
+import gzip, hashlib, json, mimetypes, os, shutil
+
+try:
+    import brotli  # optional; without it only .gz copies are built
+except ImportError:
+    brotli = None
+
+
+DIST_DIR = "dist"
+MANIFEST_NAME = "manifest.json"
+COMPRESSIBLE = {".css", ".js", ".svg", ".json", ".txt", ".xml", ".html", ".map", ".ico"}
+IMMUTABLE_MAX_AGE = 31536000  # one year
+
+
+def _fingerprint(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def build_assets(static_folder, progress=print):
+    """
+    Copy every static file to dist/ under a content-hashed name, precompress text assets
+    with gzip and brotli, and write dist/manifest.json ({"css/custom.css": "dist/css/custom.<hash>.css"}).
+    Run at deploy time (`flask build-assets`); unchanged files keep their hash.
+    """
+    dist_root = os.path.join(static_folder, DIST_DIR)
+    shutil.rmtree(dist_root, ignore_errors=True)
+    manifest = {}
+
+    for root, dirs, files in os.walk(static_folder):
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != dist_root]
+        for name in files:
+            source = os.path.join(root, name)
+            relative = os.path.relpath(source, static_folder).replace(os.sep, "/")
+            stem, extension = os.path.splitext(relative)
+            hashed = f"{DIST_DIR}/{stem}.{_fingerprint(source)}{extension}"
+            target = os.path.join(static_folder, hashed)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copy2(source, target)
+
+            if extension.lower() in COMPRESSIBLE:
+                with open(source, "rb") as f:
+                    data = f.read()
+                with open(f"{target}.gz", "wb") as f:
+                    f.write(gzip.compress(data, compresslevel=9, mtime=0))
+                if brotli is not None:
+                    with open(f"{target}.br", "wb") as f:
+                        f.write(brotli.compress(data, quality=11))
+
+            manifest[relative] = hashed
+
+    with open(os.path.join(dist_root, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    progress(f"Fingerprinted {len(manifest)} assets into {dist_root}")
+    return manifest
+
+
+def load_manifest(static_folder):
+    path = os.path.join(static_folder, DIST_DIR, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def init_app(app):
+    """
+    Route url_for('static', filename=...) to the fingerprinted copy when one exists and
+    serve fingerprinted files with far-future immutable caching and precompressed bodies.
+    Without a manifest (no build step run) everything behaves as before.
+    """
+    manifest = load_manifest(app.static_folder)
+    fingerprinted = set(manifest.values())
+    app.extensions["asset_manifest"] = manifest
+
+    def asset_url(filename):
+        return manifest.get(filename, filename)
+
+    @app.url_defaults
+    def fingerprint_static_urls(endpoint, values):
+        if endpoint == "static" and "filename" in values:
+            values["filename"] = asset_url(values["filename"])
+
+    default_static_view = app.view_functions["static"]
+
+    def static_with_caching(filename):
+        if filename not in fingerprinted:
+            return default_static_view(filename=filename)
+
+        mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        accepted = request.accept_encodings
+        served, encoding = filename, None
+        for extension, name in ((".br", "br"), (".gz", "gzip")):
+            if accepted[name] and os.path.exists(os.path.join(app.static_folder, filename + extension)):
+                served, encoding = filename + extension, name
+                break
+
+        response = send_from_directory(app.static_folder, served, mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE)
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        response.vary.add("Accept-Encoding")
+        return response
+
+    app.view_functions["static"] = static_with_caching
+    app.jinja_env.globals["asset_url"] = asset_url
@@ -0,0 +1,23 @@
+# utils/boot_profile.py
+from contextlib import contextmanager
+import time
+
+
+class BootProfile:
+    """Wall-clock time spent in each stage of create_app, kept on app.extensions["boot_profile"]."""
+
+    def __init__(self):
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((name, (time.perf_counter() - started) * 1000))
+
+    def report(self):
+        lines = [f"{name:<32} {ms:8.1f} ms" for name, ms in self.stages]
+        lines.append(f"{'total':<32} {sum(ms for _, ms in self.stages):8.1f} ms")
+        return "\n".join(lines)
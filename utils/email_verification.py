@@ -1,7 +1,7 @@
 # utils/email_verification.py
-from flask_mail import Message
 from flask import url_for, current_app
-from extensions import db, mail, serializer
+from extensions import db, serializer
+from utils.mail_queue import enqueue_email
 from itsdangerous import URLSafeTimedSerializer, SignatureExpired, BadSignature
 
 def get_serializer():
@@ -22,10 +22,8 @@ def send_reset_email(recipient, token):
     Thanks,
     College Bound Tours Team
     """
-    msg = Message(subject, recipients=[recipient], body=body)
-    mail.send(msg)
+    enqueue_email(recipient, subject, body, category="password_reset")
 
 
 def send_email(subject, recipient, body):
-    msg = Message(subject, recipients=[recipient], body=body)
-    mail.send(msg)
\ No newline at end of file
+    enqueue_email(recipient, subject, body)
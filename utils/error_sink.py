@@ -0,0 +1,170 @@
+# utils/error_sink.py
+from datetime import datetime
+from pymongo import UpdateOne
+import atexit, hashlib, os, queue, threading, time, traceback
+
+
+ERROR_COLLECTION = "error_logs"
+# Occurrences per fingerprint per day; outlives the groups (see utils/retention.py)
+ERROR_DAILY_COLLECTION = "error_log_daily"
+# Entries are written in batches every ERROR_FLUSH_SECONDS or once ERROR_BATCH_SIZE are queued
+ERROR_FLUSH_SECONDS = float(os.getenv("ERROR_FLUSH_SECONDS", "2"))
+ERROR_BATCH_SIZE = int(os.getenv("ERROR_BATCH_SIZE", "200"))
+ERROR_QUEUE_SIZE = int(os.getenv("ERROR_QUEUE_SIZE", "10000"))
+# Stack traces kept per fingerprint (newest win); counters cover every occurrence
+ERROR_SAMPLES = int(os.getenv("ERROR_SAMPLES", "5"))
+FINGERPRINT_FRAMES = 5
+
+
+def fingerprint(exc):
+    """
+    Group key for an exception: its type plus the innermost frames (file and function,
+    not line numbers, so unrelated edits to a file do not split a group).
+
+    Returns:
+        tuple: (fingerprint hex string, exception type name, [frame strings]).
+    """
+    exc_type = f"{type(exc).__module__}.{type(exc).__qualname__}"
+    frames = [
+        f"{os.path.basename(frame.filename)}:{frame.name}"
+        for frame in traceback.extract_tb(exc.__traceback__)[-FINGERPRINT_FRAMES:]
+    ]
+    digest = hashlib.sha1("|".join([exc_type, *frames]).encode("utf-8")).hexdigest()
+    return digest, exc_type, frames
+
+
+class ErrorSink:
+    """
+    Collects caught exceptions in memory and writes them from a background thread,
+    one document per fingerprint:
+
+        {_id: fingerprint, exception_type, frames, count, first_seen, last_seen,
+         last_message, last_path, samples: [{message, stack_trace, path, method, ...}]}
+
+    Recording never touches the database, needs no request or app context, and sheds
+    entries (counting them in `dropped`) if the database falls too far behind.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue(maxsize=ERROR_QUEUE_SIZE)
+        self._worker = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def record(self, exc, context=None):
+        digest, exc_type, frames = fingerprint(exc)
+        entry = {
+            "fingerprint": digest,
+            "exception_type": exc_type,
+            "frames": frames,
+            "error_message": str(exc),
+            "stack_trace": "".join(traceback.format_exception(type(exc), exc, exc.__traceback__)),
+            "timestamp": datetime.utcnow(),
+            **(context or {}),
+        }
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+        return digest
+
+    def _ensure_worker(self):
+        # A forked worker inherits the parent's queue object but not its thread
+        if self._pid == os.getpid() and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue(maxsize=ERROR_QUEUE_SIZE)
+            if self._pid != os.getpid() or not self._worker.is_alive():
+                self._pid = os.getpid()
+                self._worker = threading.Thread(target=self._run, name="error-sink", daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if batch:
+                self.flush(batch)
+
+    def _take_batch(self):
+        """Block for the first entry, then gather more until the batch or the window fills."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + ERROR_FLUSH_SECONDS
+        while len(batch) < ERROR_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def drain(self):
+        """Flush whatever is queued right now (at exit, or from a CLI command)."""
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            self.flush(batch)
+
+    def flush(self, entries):
+        """Collapse entries by fingerprint and upsert one document per group."""
+        from extensions import db
+
+        groups = {}
+        for entry in entries:
+            groups.setdefault(entry["fingerprint"], []).append(entry)
+
+        operations, daily = [], {}
+        for digest, group in groups.items():
+            latest = group[-1]
+            samples = [
+                {key: entry.get(key) for key in ("timestamp", "error_message", "stack_trace", "path", "method", "user_agent", "remote_addr")}
+                for entry in group[-ERROR_SAMPLES:]
+            ]
+            update = {
+                "$setOnInsert": {
+                    "exception_type": latest["exception_type"],
+                    "frames": latest["frames"],
+                    "first_seen": group[0]["timestamp"],
+                },
+                "$set": {
+                    "last_seen": latest["timestamp"],
+                    "last_message": latest["error_message"],
+                    "last_path": latest.get("path"),
+                },
+                "$inc": {"count": len(group)},
+                "$push": {"samples": {"$each": samples, "$slice": -ERROR_SAMPLES}},
+            }
+            if self.dropped:
+                # Attribute shed entries to a group so they stay visible
+                update["$inc"]["dropped"] = self.dropped
+                self.dropped = 0
+            operations.append(UpdateOne({"_id": digest}, update, upsert=True))
+            for entry in group:
+                day = entry["timestamp"].replace(hour=0, minute=0, second=0, microsecond=0)
+                daily[(digest, day)] = daily.get((digest, day), 0) + 1
+
+        daily_operations = [
+            UpdateOne(
+                {"_id": f"{digest}|{day:%Y-%m-%d}"},
+                {"$setOnInsert": {"fingerprint": digest, "day": day}, "$inc": {"count": count}},
+                upsert=True,
+            )
+            for (digest, day), count in daily.items()
+        ]
+        try:
+            db[ERROR_COLLECTION].bulk_write(operations, ordered=False)
+            db[ERROR_DAILY_COLLECTION].bulk_write(daily_operations, ordered=False)
+        except Exception as e:
+            print(f"🚨 Error log flush failed ({len(entries)} entries): {e}")
+
+
+error_sink = ErrorSink()
+atexit.register(error_sink.drain)
@@ -0,0 +1,81 @@
+# utils/file_delivery.py
+from flask import abort, make_response, send_file
+import mimetypes, os
+
+
+PRIVATE_UPLOAD_ROOT = os.path.realpath(os.getenv("PRIVATE_UPLOAD_ROOT", "uploads_private"))
+
+# "sendfile" streams through the WSGI server's file wrapper.
+# "x-accel" hands the transfer to nginx (internal location mapped to PRIVATE_UPLOAD_ROOT).
+# "x-sendfile" hands it to Apache mod_xsendfile / lighttpd (app.py turns on USE_X_SENDFILE).
+FILE_DELIVERY = os.getenv("FILE_DELIVERY", "sendfile").lower()
+X_ACCEL_PREFIX = os.getenv("X_ACCEL_PREFIX", "/protected-uploads")
+
+
+def resolve_private_path(stored_path):
+    """
+    Map a path saved in the database to an absolute file inside PRIVATE_UPLOAD_ROOT.
+    Anything that escapes the root or no longer exists is a 404.
+    """
+    if not stored_path:
+        abort(404)
+
+    # Upload paths are saved relative to the working directory, same as test_file writes them
+    full_path = os.path.realpath(stored_path)
+    if os.path.commonpath([full_path, PRIVATE_UPLOAD_ROOT]) != PRIVATE_UPLOAD_ROOT:
+        abort(404)
+    if not os.path.isfile(full_path):
+        abort(404)
+    return full_path
+
+
+def _private_headers(response, max_age):
+    """Private uploads must never land in a shared cache, only in the reviewer's browser."""
+    response.cache_control.public = False  # send_file marks any max_age > 0 response public
+    response.cache_control.private = True
+    response.cache_control.max_age = max_age
+    if not max_age:
+        response.cache_control.no_cache = True
+    response.headers["X-Content-Type-Options"] = "nosniff"
+    return response
+
+
+def send_private_file(stored_path, mimetype=None, as_attachment=False, max_age=0):
+    """
+    Stream a private upload without reading it into worker memory.
+
+    Range, If-None-Match and If-Modified-Since are answered by Werkzeug when the
+    file is served here; with an X-Accel/X-Sendfile handoff the front server does it.
+
+    Args:
+        stored_path (str): Path as stored on the user's profile.
+        mimetype (str): Override the guessed content type.
+        as_attachment (bool): Force a download instead of inline display.
+        max_age (int): Seconds the browser may reuse the file without revalidating.
+
+    Returns:
+        flask.Response
+    """
+    full_path = resolve_private_path(stored_path)
+    mimetype = mimetype or mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+
+    if FILE_DELIVERY == "x-accel":
+        relative = os.path.relpath(full_path, PRIVATE_UPLOAD_ROOT).replace(os.sep, "/")
+        response = make_response("")
+        response.headers["X-Accel-Redirect"] = f"{X_ACCEL_PREFIX}/{relative}"
+        response.headers["Content-Type"] = mimetype
+        disposition = "attachment" if as_attachment else "inline"
+        response.headers["Content-Disposition"] = f'{disposition}; filename="{os.path.basename(full_path)}"'
+        return _private_headers(response, max_age)
+
+    response = send_file(
+        full_path,
+        mimetype=mimetype,
+        as_attachment=as_attachment,
+        download_name=os.path.basename(full_path),
+        conditional=True,
+        etag=True,
+        max_age=max_age,
+    )
+    response.headers["Accept-Ranges"] = "bytes"
+    return _private_headers(response, max_age)
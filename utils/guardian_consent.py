@@ -0,0 +1,227 @@
+# utils/guardian_consent.py
+from bson import ObjectId
+from datetime import datetime, timedelta
+from flask import url_for
+from itsdangerous import BadSignature
+from extensions import serializer
+from pymongo import UpdateOne
+from utils.joins import id_forms, lookup_by_id
+from utils.mail_queue import campaign_delivery_counts, enqueue_many
+from utils.tour_dates import format_tour_date, parse_tour_date, tour_date_filter
+import os
+
+
+CAMPAIGN_COLLECTION = "consent_campaigns"
+# A reservation's guardian is reminded at most once per this window, single or bulk
+REMINDER_THROTTLE = timedelta(hours=1)
+REMINDER_BATCH_SIZE = int(os.getenv("REMINDER_BATCH_SIZE", "200"))
+# Reminders wait in the mail queue behind the provider's rate limits, so their links get
+# their own salt and outlive the 1-hour links sent directly from the consent flow
+REMINDER_TOKEN_SALT = "consent-reminder"
+REMINDER_LINK_DAYS = int(os.getenv("REMINDER_LINK_DAYS", "7"))
+
+
+def _join(collection, local_field, as_field, keep_missing):
+    return [
+        *lookup_by_id(collection, local_field, as_field),
+        {"$unwind": {"path": f"${as_field}", "preserveNullAndEmptyArrays": keep_missing}},
+    ]
+
+
+def unverified_pipeline(match=None, tour_id=None, start=None, end=None, keep_missing=False, after=None, limit=None):
+    """
+    Aggregation stages for reservations still awaiting guardian consent, each joined to
+    its student's name and its tour's title and date.
+
+    Args:
+        match (dict): Extra reservation conditions, applied before the joins.
+        tour_id (str): Only this tour.
+        start, end: Tour date range (start inclusive, end exclusive).
+        keep_missing (bool): Keep reservations whose student or tour is gone (fields None)
+            instead of dropping them.
+        after (ObjectId): Cursor pagination: only reservations with a greater _id.
+        limit (int): At most this many rows, in _id order. Without a date range the page is
+            cut before the joins, so only its own rows are looked up.
+
+    Returns:
+        list: Pipeline stages producing {_id, user_id, tour_id, parent_email,
+        last_consent_resent, student_name, tour_title, tour_date}.
+    """
+    conditions = {"parent_verified": {"$ne": True}, **(match or {})}
+    if tour_id:
+        conditions["tour_id"] = {"$in": id_forms(tour_id)}
+    if after:
+        conditions["_id"] = {"$gt": after}
+    page = [{"$sort": {"_id": 1}}, {"$limit": limit}] if limit else []
+    dated = bool(start or end)
+
+    stages = [{"$match": conditions}, *([] if dated else page)]
+    stages += _join("users", "user_id", "student", keep_missing)
+    stages += _join("tour_instances", "tour_id", "tour", keep_missing)
+    if dated:
+        stages += [{"$match": tour_date_filter(start, end, field="tour.date")}, *page]
+    stages.append({"$project": {
+        "user_id": 1,
+        "tour_id": 1,
+        "parent_email": 1,
+        "last_consent_resent": 1,
+        "student_name": "$student.name",
+        "tour_title": "$tour.title",
+        "tour_date": "$tour.date",
+    }})
+    return stages
+
+
+def due_for_reminder(now):
+    """Reservation conditions: has a guardian address and was not reminded within REMINDER_THROTTLE."""
+    return {
+        "parent_email": {"$nin": [None, ""]},
+        "$or": [
+            {"last_consent_resent": None},
+            {"last_consent_resent": {"$lt": now - REMINDER_THROTTLE}},
+        ],
+    }
+
+
+def reminder_message(row):
+    """enqueue_many arguments for one row of unverified_pipeline."""
+    token = serializer.dumps({
+        "student_id": str(row["user_id"]),
+        "tour_id": str(row["tour_id"]),
+        "parent_email": row["parent_email"]
+    }, salt=REMINDER_TOKEN_SALT)
+    link = url_for("parent.confirm_parent", token=token, _external=True)
+    body = f"""
+        Hello,
+
+        This is a reminder to complete your parental consent for:
+        Student: {row.get('student_name', 'your student')}
+        Tour: {row.get('tour_title') or 'a scheduled tour'} on {format_tour_date(row.get('tour_date'), '%B %d, %Y')}
+
+        Confirm here: {link}
+
+        If you already completed this, thank you. This link expires in {REMINDER_LINK_DAYS} days.
+        """
+    return {"recipients": row["parent_email"], "subject": "Parental Consent Reminder", "body": body}
+
+
+def load_consent_token(token):
+    """
+    Payload of a parent consent link: a 1-hour link from the consent flow, or a reminder
+    link (REMINDER_TOKEN_SALT, REMINDER_LINK_DAYS). Raises SignatureExpired / BadSignature.
+    """
+    try:
+        return serializer.loads(token, max_age=3600)
+    except BadSignature:
+        return serializer.loads(token, salt=REMINDER_TOKEN_SALT, max_age=REMINDER_LINK_DAYS * 86400)
+
+
+def queue_reminders(db, rows, now, campaign_id=None):
+    """
+    Claim rows for reminding and queue their emails.
+
+    The claim is one update_many that re-checks the throttle, so a reservation picked up
+    by a concurrent campaign or a single resend in the meantime is skipped, not emailed twice.
+    Messages are rendered before the claim, and if queueing them fails the claim is
+    released, so a failed batch does not hold its guardians back for REMINDER_THROTTLE.
+
+    Returns:
+        int: Reminders queued.
+    """
+    if not rows:
+        return 0
+    messages = {row["_id"]: reminder_message(row) for row in rows}
+    claim = ObjectId()
+    db.reservations.update_many(
+        {"_id": {"$in": list(messages)}, **due_for_reminder(now)},
+        {"$set": {"last_consent_resent": now, "last_consent_claim": claim}}
+    )
+    claimed = {doc["_id"] for doc in db.reservations.find({"_id": {"$in": list(messages)}, "last_consent_claim": claim}, {"_id": 1})}
+    try:
+        enqueue_many([messages[row["_id"]] for row in rows if row["_id"] in claimed], category="consent_reminder", campaign_id=campaign_id)
+    except Exception:
+        release = []
+        for row in rows:
+            if row["_id"] not in claimed:
+                continue
+            previous = row.get("last_consent_resent")
+            update = {"$unset": {"last_consent_claim": ""}}
+            if previous:
+                update["$set"] = {"last_consent_resent": previous}
+            else:
+                update["$unset"]["last_consent_resent"] = ""
+            release.append(UpdateOne({"_id": row["_id"], "last_consent_claim": claim}, update))
+        if release:
+            db.reservations.bulk_write(release, ordered=False)
+        raise
+    return len(claimed)
+
+
+def start_campaign(db, tour_id=None, start=None, end=None, created_by=None, batch_size=REMINDER_BATCH_SIZE):
+    """
+    Queue consent reminders for every due, unverified reservation of a tour or date range.
+
+    Reservations are selected by one aggregation (throttle included) and queued
+    batch_size at a time; the campaign document's selected/queued counters are updated
+    after each batch and its messages carry campaign_id, so campaign_progress can report
+    both queueing and delivery.
+
+    Returns:
+        ObjectId: The campaign's _id.
+    """
+    now = datetime.utcnow()
+    campaign = {
+        "created_at": now,
+        "created_by": created_by,
+        "filters": {"tour_id": tour_id, "start": parse_tour_date(start), "end": parse_tour_date(end)},
+        "status": "queueing",
+        "selected": 0,
+        "queued": 0,
+    }
+    campaign_id = db[CAMPAIGN_COLLECTION].insert_one(campaign).inserted_id
+
+    def flush(batch):
+        campaign["selected"] += len(batch)
+        campaign["queued"] += queue_reminders(db, batch, now, campaign_id)
+        db[CAMPAIGN_COLLECTION].update_one(
+            {"_id": campaign_id},
+            {"$set": {"selected": campaign["selected"], "queued": campaign["queued"]}}
+        )
+
+    try:
+        batch = []
+        for row in db.reservations.aggregate(unverified_pipeline(due_for_reminder(now), tour_id, start, end)):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch = []
+        if batch:
+            flush(batch)
+    except Exception as e:
+        db[CAMPAIGN_COLLECTION].update_one(
+            {"_id": campaign_id},
+            {"$set": {"status": "failed", "error": f"{type(e).__name__}: {e}", "finished_at": datetime.utcnow()}}
+        )
+        raise
+    db[CAMPAIGN_COLLECTION].update_one(
+        {"_id": campaign_id},
+        {"$set": {"status": "queued", "finished_at": datetime.utcnow()}}
+    )
+    return campaign_id
+
+
+def recent_campaigns(db, limit=20):
+    """Newest campaigns first, each with delivery: {status: count} from the mail queue."""
+    campaigns = list(db[CAMPAIGN_COLLECTION].find().sort("created_at", -1).limit(limit))
+    counts = campaign_delivery_counts([campaign["_id"] for campaign in campaigns])
+    for campaign in campaigns:
+        campaign["delivery"] = counts[campaign["_id"]]
+    return campaigns
+
+
+def campaign_progress(db, campaign_id):
+    """One campaign with its delivery counts, or None."""
+    campaign = db[CAMPAIGN_COLLECTION].find_one({"_id": campaign_id})
+    if campaign:
+        campaign["delivery"] = campaign_delivery_counts([campaign_id])[campaign_id]
+    return campaign
@@ -0,0 +1,113 @@
+# utils/identity_map.py
+from flask import g, has_request_context
+from pymongo import monitoring
+
+
+WRITE_COMMANDS = {"insert", "update", "delete", "findAndModify"}
+
+
+def _identity_map():
+    """Per-request {(collection, _id): (document, fields)}; fields is None for a full document."""
+    if not has_request_context():
+        return None
+    identity_map = g.get("_identity_map")
+    if identity_map is None:
+        identity_map = g._identity_map = {}
+    return identity_map
+
+
+def get_document(collection, _id, projection=None):
+    """
+    Fetch a document by _id at most once per request.
+
+    A later call is answered from the request's identity map when the cached copy holds
+    every field it asks for; otherwise the document is re-read with the union of both
+    projections. Any write to the collection during the request clears its entries
+    (see IdentityMapInvalidator), so callers never see data older than their own writes.
+
+    Args:
+        collection (str): Collection name, e.g. "tour_instances".
+        _id: The _id exactly as stored (ObjectId or str); it is not coerced.
+        projection (dict): Optional inclusion projection.
+
+    Returns:
+        dict or None
+    """
+    from extensions import db
+
+    fields = set(projection) if projection else None
+    identity_map = _identity_map()
+    if identity_map is None:
+        return db[collection].find_one({"_id": _id}, projection)
+
+    key = (collection, _id)
+    cached = identity_map.get(key)
+    if cached is not None:
+        document, cached_fields = cached
+        if cached_fields is None or (fields is not None and fields <= cached_fields):
+            return document
+        fields = None if fields is None else fields | cached_fields
+
+    document = db[collection].find_one({"_id": _id}, {field: 1 for field in fields} if fields else None)
+    identity_map[key] = (document, fields)
+    return document
+
+
+def get_documents(collection, ids, projection=None):
+    """
+    Fetch several documents by _id with one $in query for the ones not already mapped.
+
+    Returns:
+        dict: {_id: document} for the ids that exist.
+    """
+    from extensions import db
+
+    identity_map = _identity_map()
+    fields = set(projection) if projection else None
+    found, missing = {}, []
+    for _id in dict.fromkeys(ids):
+        cached = identity_map.get((collection, _id)) if identity_map is not None else None
+        if cached is not None and (cached[1] is None or (fields is not None and fields <= cached[1])):
+            if cached[0] is not None:
+                found[_id] = cached[0]
+        else:
+            missing.append(_id)
+
+    if missing:
+        for document in db[collection].find({"_id": {"$in": missing}}, projection):
+            found[document["_id"]] = document
+            if identity_map is not None:
+                identity_map[(collection, document["_id"])] = (document, fields)
+        if identity_map is not None:
+            for _id in missing:
+                identity_map.setdefault((collection, _id), (None, fields))
+    return found
+
+
+def invalidate(collection, _id=None):
+    """Drop one mapped document, or every document of a collection when _id is None."""
+    identity_map = _identity_map()
+    if not identity_map:
+        return
+    if _id is not None:
+        identity_map.pop((collection, _id), None)
+        return
+    for key in [key for key in identity_map if key[0] == collection]:
+        del identity_map[key]
+
+
+class IdentityMapInvalidator(monitoring.CommandListener):
+    """
+    Clears a collection's mapped documents whenever the current request writes to it,
+    so the existing db.<collection>.update_one(...) call sites need no changes.
+    """
+
+    def started(self, event):
+        if event.command_name in WRITE_COMMANDS and has_request_context():
+            invalidate(event.command.get(event.command_name))
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
@@ -0,0 +1,155 @@
+# utils/indexes.py
+from bson import ObjectId
+from datetime import datetime
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+
+# One entry per collection the routes filter or sort on. Field order follows the
+# equality-then-sort/range rule so each index also serves the sort in the matching query.
+INDEXES = {
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email"),
+        IndexModel([("role", ASCENDING)], name="role"),
+    ],
+    "student_parent_links": [
+        IndexModel([("parent_id", ASCENDING), ("status", ASCENDING)], name="parent_id_status"),
+        IndexModel([("student_id", ASCENDING), ("status", ASCENDING)], name="student_id_status"),
+        IndexModel([("student_email", ASCENDING)], name="student_email"),
+    ],
+    "reservations": [
+        IndexModel([("user_id", ASCENDING), ("tour_id", ASCENDING)], name="user_id_tour_id"),
+        IndexModel([("parent_id", ASCENDING)], name="parent_id"),
+        IndexModel([("parent_verified", ASCENDING), ("tour_id", ASCENDING)], name="parent_verified_tour_id"),
+    ],
+    "cart": [
+        IndexModel([("user_id", ASCENDING), ("status", ASCENDING)], name="user_id_status"),
+    ],
+    "tour_instances": [
+        IndexModel([("date", ASCENDING)], name="date"),
+        IndexModel([("driver_id", ASCENDING), ("date", ASCENDING)], name="driver_id_date"),
+    ],
+    "consent_forms": [
+        IndexModel([("student_id", ASCENDING), ("tour_id", ASCENDING), ("signed_date", DESCENDING)], name="student_id_tour_id_signed_date"),
+    ],
+    "code_of_conducts": [
+        IndexModel([("user_id", ASCENDING), ("signed_date", DESCENDING)], name="user_id_signed_date"),
+    ],
+    "temporary_selections": [
+        IndexModel([("parent_id", ASCENDING), ("tour_id", ASCENDING)], name="parent_id_tour_id"),
+    ],
+    "background_checks": [
+        IndexModel([("user_id", ASCENDING), ("status", ASCENDING)], name="user_id_status"),
+    ],
+    # History reads only (utils/archive.py); archived rows are never updated
+    "reservations_archive": [
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+        IndexModel([("parent_id", ASCENDING)], name="parent_id"),
+    ],
+    "cart_archive": [
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+    ],
+    "tour_instances_archive": [
+        IndexModel([("date", ASCENDING)], name="date"),
+    ],
+    "photos": [
+        IndexModel([("approved", ASCENDING)], name="approved"),
+    ],
+    # Worker claims (utils/mail_queue.py), the per-minute and daily counts, and campaign progress
+    "mail_queue": [
+        IndexModel([("status", ASCENDING), ("priority", DESCENDING), ("next_attempt_at", ASCENDING)], name="status_priority_next_attempt_at"),
+        IndexModel([("status", ASCENDING), ("finished_at", ASCENDING)], name="status_finished_at"),
+        IndexModel([("campaign_id", ASCENDING)], name="campaign_id", sparse=True),
+    ],
+    "consent_campaigns": [
+        IndexModel([("created_at", DESCENDING)], name="created_at"),
+    ],
+}
+
+
+# Date fields that expire rows (unanswered.timestamp, messages.timestamp, ...) are indexed
+# as TTL indexes by utils/retention.py and serve those collections' sorts as well.
+
+
+# Representative filters the app sends, used by the advisor. Values only need the right type.
+_sample_id = ObjectId()
+QUERY_SHAPES = [
+    ("auth.login", "users", {"email": "someone@example.com"}, None),
+    ("tours.get_linked_users", "student_parent_links", {"parent_id": str(_sample_id), "status": "approved"}, None),
+    ("tours.get_linked_users", "student_parent_links", {"student_id": str(_sample_id), "status": "approved"}, None),
+    ("tours.process_selected_students", "student_parent_links", {"student_email": "someone@example.com"}, None),
+    ("tours.reserve_tour", "reservations", {"user_id": str(_sample_id), "tour_id": str(_sample_id)}, None),
+    ("auth.dashboard", "reservations", {"parent_id": _sample_id}, None),
+    ("admin.guardian_verification_report", "reservations", {"parent_verified": {"$ne": True}}, None),
+    ("tours.cart", "cart", {"user_id": _sample_id, "status": "pending"}, None),
+    ("tours.tour_schedule", "tour_instances", {"date": {"$gte": datetime.utcnow()}}, [("date", ASCENDING)]),
+    ("driver.driver_panel", "tour_instances", {"driver_id": _sample_id, "date": {"$gte": datetime.utcnow()}}, [("date", ASCENDING)]),
+    ("tours.has_signed_consent_form", "consent_forms", {"student_id": str(_sample_id), "tour_id": str(_sample_id), "signed_date": {"$gte": datetime.utcnow()}}, None),
+    ("tours.has_signed_code_of_conduct", "code_of_conducts", {"user_id": str(_sample_id), "signed_date": {"$gte": datetime.utcnow()}}, None),
+    ("tours.get_selected_students", "temporary_selections", {"parent_id": str(_sample_id), "tour_id": str(_sample_id)}, None),
+    ("tours.has_recent_background_check", "background_checks", {"user_id": str(_sample_id), "status": "approved"}, None),
+    ("ai.view_unanswered", "unanswered", {}, [("timestamp", DESCENDING)]),
+    ("home", "photos", {"approved": True}, None),
+]
+
+
+def ensure_indexes(db, collections=None):
+    """
+    Create every registered index. create_indexes is a no-op for indexes that already
+    exist with the same spec, so this is safe to run on every deploy.
+
+    Returns:
+        dict: {collection: [index names created or confirmed] or error message}
+    """
+    results = {}
+    for collection, models in INDEXES.items():
+        if collections and collection not in collections:
+            continue
+        try:
+            results[collection] = db[collection].create_indexes(models)
+        except OperationFailure as e:
+            # e.g. an index with the same name but different keys; needs a manual drop
+            results[collection] = f"failed: {e}"
+    return results
+
+
+def _plan_stages(plan):
+    """Yield every stage name in a (possibly nested) winning plan."""
+    if not isinstance(plan, dict):
+        return
+    if "stage" in plan:
+        yield plan["stage"]
+    for key in ("inputStage", "queryPlan"):
+        yield from _plan_stages(plan.get(key))
+    for child in plan.get("inputStages", []):
+        yield from _plan_stages(child)
+
+
+def advise(db):
+    """
+    Replay QUERY_SHAPES through explain() and report which ones the server
+    would answer with a collection scan or an in-memory sort.
+
+    Returns:
+        list of dicts: one row per shape with its endpoint, winning stages and a verdict.
+    """
+    report = []
+    for endpoint, collection, filter, sort in QUERY_SHAPES:
+        cursor = db[collection].find(filter)
+        if sort:
+            cursor = cursor.sort(sort)
+        try:
+            plan = cursor.explain().get("queryPlanner", {}).get("winningPlan", {})
+        except OperationFailure as e:
+            report.append({"endpoint": endpoint, "collection": collection, "filter": filter, "stages": [], "verdict": f"explain failed: {e}"})
+            continue
+
+        stages = list(_plan_stages(plan))
+        if "COLLSCAN" in stages:
+            verdict = "COLLSCAN"
+        elif "SORT" in stages:
+            verdict = "in-memory sort"
+        else:
+            verdict = "ok"
+        report.append({"endpoint": endpoint, "collection": collection, "filter": filter, "stages": stages, "verdict": verdict})
+    return report
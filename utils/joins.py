@@ -0,0 +1,30 @@
+# utils/joins.py
+from bson import ObjectId
+
+
+def id_forms(value):
+    """Both stored forms of an id, for equality matches on user_id / tour_id."""
+    forms = [str(value)]
+    if ObjectId.is_valid(forms[0]):
+        forms.append(ObjectId(forms[0]))
+    return forms
+
+
+def lookup_by_id(collection, local_field, as_field):
+    """
+    $lookup stages joining local_field to collection._id whichever form either side uses.
+
+    Reference fields such as tour_id and user_id are stored as strings or ObjectIds
+    depending on the code path that wrote them, and some documents have string _ids.
+    The join key is an array of the raw value and its ObjectId conversion; $lookup
+    matches any element, so both forms are tried against the _id index.
+    """
+    keys = f"_{as_field}_keys"
+    return [
+        {"$set": {keys: [
+            f"${local_field}",
+            {"$convert": {"input": f"${local_field}", "to": "objectId", "onError": f"${local_field}", "onNull": None}},
+        ]}},
+        {"$lookup": {"from": collection, "localField": keys, "foreignField": "_id", "as": as_field}},
+        {"$unset": keys},
+    ]
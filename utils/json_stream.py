@@ -0,0 +1,186 @@
+# utils/json_stream.py
+from bson import Decimal128, ObjectId
+from datetime import date, datetime
+from flask import Response, request, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+import csv, io, json
+
+
+# Never serialized, at any depth, whatever the caller's projection was
+SENSITIVE_FIELDS = frozenset({"password", "password_hash", "reset_token", "activation_token"})
+
+
+def _default(value):
+    """Types the C encoder does not know; called only when it meets one."""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat() + ("Z" if value.tzinfo is None else "")
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal128):
+        return str(value.to_decimal())  # a string keeps the exact decimal; a float would round
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+_encoder = json.JSONEncoder(default=_default, separators=(",", ":"), ensure_ascii=False)
+
+
+def strip_denied(value, denylist=SENSITIVE_FIELDS):
+    """
+    Remove denylisted keys at any depth. Containers are only copied when something
+    below them is actually removed, so clean documents pass through untouched.
+    """
+    if isinstance(value, dict):
+        cleaned = value
+        for key, item in value.items():
+            if key in denylist:
+                replacement = _REMOVED
+            elif isinstance(item, (dict, list)):
+                replacement = strip_denied(item, denylist)
+            else:
+                continue
+            if replacement is item:
+                continue
+            if cleaned is value:
+                cleaned = dict(value)
+            if replacement is _REMOVED:
+                del cleaned[key]
+            else:
+                cleaned[key] = replacement
+        return cleaned
+    if isinstance(value, list):
+        cleaned = value
+        for index, item in enumerate(value):
+            if isinstance(item, (dict, list)):
+                replacement = strip_denied(item, denylist)
+                if replacement is not item:
+                    if cleaned is value:
+                        cleaned = list(value)
+                    cleaned[index] = replacement
+        return cleaned
+    return value
+
+
+_REMOVED = object()
+
+
+def dumps(value, denylist=SENSITIVE_FIELDS):
+    """
+    Serialize Mongo documents. ObjectId, datetime and Decimal128 are converted by the C
+    encoder's default hook as it meets them, instead of by a copy of the whole document.
+    """
+    return _encoder.encode(strip_denied(value, denylist) if denylist else value)
+
+
+def iter_json_array(rows, denylist=SENSITIVE_FIELDS):
+    """Yield a JSON array one row at a time."""
+    yield "["
+    first = True
+    for row in rows:
+        yield ("" if first else ",") + dumps(row, denylist)
+        first = False
+    yield "]"
+
+
+def iter_ndjson(rows, denylist=SENSITIVE_FIELDS):
+    """Yield one JSON document per line."""
+    for row in rows:
+        yield dumps(row, denylist) + "\n"
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, (int, float)):
+        return str(value)
+    if isinstance(value, (dict, list)):
+        return dumps(value)
+    if not isinstance(value, str):
+        try:
+            return _default(value)
+        except TypeError:
+            return str(value)
+    # Spreadsheets run cells starting with these as formulas; user-entered names must not
+    if value[:1] in ("=", "+", "-", "@", "\t", "\r"):
+        return "'" + value
+    return value
+
+
+def iter_csv(rows, columns, denylist=SENSITIVE_FIELDS):
+    """Yield a header line, then one CSV line per row (a dict) with the given columns."""
+    columns = [column for column in columns if column not in denylist]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def line(values):
+        writer.writerow(values)
+        chunk = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return chunk
+
+    yield line(columns)
+    for row in rows:
+        yield line([_csv_value(row.get(column)) for column in columns])
+
+
+def _streamed(chunks, mimetype, filename):
+    response = Response(stream_with_context(chunks), mimetype=mimetype)
+    if filename:
+        response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    # Rows are produced as the cursor advances; keep proxies from buffering the whole body
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+def stream_json(rows, filename=None, denylist=SENSITIVE_FIELDS):
+    """
+    Stream an iterable (e.g. a pymongo cursor or generator) as a JSON array, so memory
+    stays at one row however large the export is.
+    """
+    return _streamed(iter_json_array(rows, denylist), "application/json", filename)
+
+
+def stream_ndjson(rows, filename=None, denylist=SENSITIVE_FIELDS):
+    """Stream an iterable as newline-delimited JSON."""
+    return _streamed(iter_ndjson(rows, denylist), "application/x-ndjson", filename)
+
+
+def stream_csv(rows, columns, filename=None, denylist=SENSITIVE_FIELDS):
+    """Stream an iterable of dicts as CSV with the given columns."""
+    return _streamed(iter_csv(rows, columns, denylist), "text/csv", filename)
+
+
+def stream_export(rows, basename, denylist=SENSITIVE_FIELDS, columns=None):
+    """
+    JSON, NDJSON or (when the endpoint names its columns) CSV depending on ?format=,
+    for admin export endpoints.
+    """
+    export_format = request.args.get("format")
+    if export_format == "csv" and columns:
+        return stream_csv(rows, columns, f"{basename}.csv", denylist)
+    if export_format == "ndjson":
+        return stream_ndjson(rows, f"{basename}.ndjson", denylist)
+    return stream_json(rows, f"{basename}.json", denylist)
+
+
+def _provider_default(value):
+    # Only the BSON types are added; datetime, UUID, Decimal, dataclasses and __html__
+    # keep Flask's handling so existing jsonify responses do not change
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, Decimal128):
+        return str(value.to_decimal())
+    return DefaultJSONProvider.default(value)
+
+
+class MongoJSONProvider(DefaultJSONProvider):
+    """jsonify() support for ObjectId and Decimal128, with the denylist applied."""
+
+    default = staticmethod(_provider_default)
+
+    def dumps(self, obj, **kwargs):
+        return super().dumps(strip_denied(obj), **kwargs)
@@ -0,0 +1,260 @@
+# utils/mail_queue.py
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+import os, random, smtplib, socket, time, uuid
+
+
+MAIL_QUEUE_COLLECTION = "mail_queue"
+# Provider limits (Gmail allows roughly 20/minute and 2000/day on Workspace accounts)
+MAIL_RATE_PER_MINUTE = int(os.getenv("MAIL_RATE_PER_MINUTE", "20"))
+MAIL_DAILY_LIMIT = int(os.getenv("MAIL_DAILY_LIMIT", "1500"))
+# Messages sent over one SMTP session before it is recycled
+MAIL_BATCH_SIZE = int(os.getenv("MAIL_BATCH_SIZE", "50"))
+MAIL_MAX_ATTEMPTS = int(os.getenv("MAIL_MAX_ATTEMPTS", "8"))
+MAIL_RETRY_BASE_SECONDS = 30
+MAIL_RETRY_MAX_SECONDS = 3600
+# A claimed message whose worker died is picked up again after this long
+MAIL_LOCK_SECONDS = 300
+MAIL_IDLE_SECONDS = 5
+# Claimed highest first. Password resets carry 1-hour tokens, so they must not wait
+# behind a bulk campaign; anything not listed is 0
+MAIL_PRIORITIES = {"password_reset": 10}
+
+# Connection-level and 4xx failures are worth retrying; 5xx replies are not
+TRANSIENT_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, socket.timeout, ConnectionError, OSError)
+# Errors after which the SMTP session cannot carry another message
+SESSION_ERRORS = (smtplib.SMTPServerDisconnected, socket.timeout, ConnectionError)
+
+
+def _queued(recipients, subject, body, html=None, sender=None, category=None, send_after=None, campaign_id=None, now=None):
+    now = now or datetime.utcnow()
+    document = {
+        "recipients": [recipients] if isinstance(recipients, str) else list(recipients),
+        "subject": subject,
+        "body": body,
+        "html": html,
+        "sender": sender,
+        "category": category,
+        "priority": MAIL_PRIORITIES.get(category, 0),
+        "status": "queued",
+        "attempts": 0,
+        "created_at": now,
+        "next_attempt_at": send_after or now,
+    }
+    if campaign_id is not None:
+        document["campaign_id"] = campaign_id  # left off otherwise, so the campaign_id index stays sparse
+    return document
+
+
+def enqueue_email(recipients, subject, body, html=None, sender=None, category=None, send_after=None, campaign_id=None):
+    """
+    Queue an email for the mail worker instead of sending it inside the request.
+
+    Args:
+        recipients (str or list): Address or addresses.
+        subject (str): Subject line.
+        body (str): Plain-text body.
+        html (str): Optional HTML body.
+        sender (str): Defaults to MAIL_DEFAULT_SENDER.
+        category (str): Free-form tag for reporting, e.g. "password_reset".
+        send_after (datetime): Hold the message until this time (UTC).
+        campaign_id: Groups the messages of one bulk send, for progress counts.
+
+    Returns:
+        ObjectId: The queued message's _id, for tracking its status.
+    """
+    from extensions import db
+
+    return db[MAIL_QUEUE_COLLECTION].insert_one(
+        _queued(recipients, subject, body, html, sender, category, send_after, campaign_id)
+    ).inserted_id
+
+
+def enqueue_many(messages, **common):
+    """
+    Queue several emails with one insert_many.
+
+    Args:
+        messages (iterable of dict): enqueue_email arguments per message.
+        **common: Arguments shared by every message, e.g. category or campaign_id.
+
+    Returns:
+        list: The queued messages' _ids, in order.
+    """
+    from extensions import db
+
+    now = datetime.utcnow()
+    documents = [_queued(**{**common, **message}, now=now) for message in messages]
+    if not documents:
+        return []
+    return db[MAIL_QUEUE_COLLECTION].insert_many(documents).inserted_ids
+
+
+def campaign_delivery_counts(campaign_ids):
+    """{campaign_id: {status: count}} for the messages of the given campaigns, in one aggregation."""
+    from extensions import db
+
+    counts = {campaign_id: {} for campaign_id in campaign_ids}
+    for row in db[MAIL_QUEUE_COLLECTION].aggregate([
+        {"$match": {"campaign_id": {"$in": list(campaign_ids)}}},
+        {"$group": {"_id": {"campaign_id": "$campaign_id", "status": "$status"}, "count": {"$sum": 1}}},
+    ]):
+        counts[row["_id"]["campaign_id"]][row["_id"]["status"]] = row["count"]
+    return counts
+
+
+def _backoff(attempts):
+    delay = min(MAIL_RETRY_BASE_SECONDS * 2 ** (attempts - 1), MAIL_RETRY_MAX_SECONDS)
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def _is_transient(error):
+    # SMTPException subclasses OSError, so reply codes are checked before the generic tuple
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    return isinstance(error, TRANSIENT_ERRORS)
+
+
+class MailWorker:
+    """
+    Drains mail_queue over pooled SMTP sessions: one connection carries up to
+    MAIL_BATCH_SIZE messages, sends are paced to MAIL_RATE_PER_MINUTE and stop for the
+    day at MAIL_DAILY_LIMIT. Failures are retried with exponential backoff and jitter;
+    permanent ones (5xx) and messages past MAIL_MAX_ATTEMPTS are marked failed.
+
+    Messages are claimed one at a time with find_one_and_update, highest priority
+    first, so several workers can run side by side without sending anything twice. The
+    per-minute and daily limits are counted from sent messages in Mongo, so they hold
+    for all workers together (two workers checking at the same instant can overshoot
+    the minute by one message each).
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._interval = 60.0 / MAIL_RATE_PER_MINUTE if MAIL_RATE_PER_MINUTE > 0 else 0
+        self._last_send = 0.0
+
+    @property
+    def queue(self):
+        from extensions import db
+        return db[MAIL_QUEUE_COLLECTION]
+
+    def claim(self):
+        now = datetime.utcnow()
+        return self.queue.find_one_and_update(
+            {"$or": [
+                {"status": "queued", "next_attempt_at": {"$lte": now}},
+                {"status": "sending", "locked_until": {"$lt": now}},
+            ]},
+            {"$set": {"status": "sending", "locked_by": self.worker_id, "locked_until": now + timedelta(seconds=MAIL_LOCK_SECONDS)}},
+            sort=[("priority", -1), ("next_attempt_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    def sent_last_day(self):
+        return self.queue.count_documents({"status": "sent", "finished_at": {"$gte": datetime.utcnow() - timedelta(days=1)}})
+
+    def sent_last_minute(self):
+        """finished_at of the messages sent in the last minute, by every worker, oldest first."""
+        return [
+            document["finished_at"]
+            for document in self.queue.find(
+                {"status": "sent", "finished_at": {"$gte": datetime.utcnow() - timedelta(minutes=1)}},
+                {"finished_at": 1, "_id": 0},
+            ).sort("finished_at", 1).limit(MAIL_RATE_PER_MINUTE)
+        ]
+
+    def _pace(self):
+        # Spread this worker's sends evenly...
+        wait = self._last_send + self._interval - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        # ...and hold the shared one-minute window to MAIL_RATE_PER_MINUTE across workers
+        while MAIL_RATE_PER_MINUTE > 0:
+            recent = self.sent_last_minute()
+            if len(recent) < MAIL_RATE_PER_MINUTE:
+                break
+            time.sleep(max((recent[0] + timedelta(minutes=1) - datetime.utcnow()).total_seconds(), 0.1))
+        self._last_send = time.monotonic()
+
+    def _message(self, document):
+        from flask_mail import Message
+        return Message(
+            document["subject"],
+            recipients=document["recipients"],
+            body=document["body"],
+            html=document.get("html"),
+            sender=document.get("sender") or self.app.config.get("MAIL_DEFAULT_SENDER"),
+        )
+
+    def _mark_sent(self, document):
+        now = datetime.utcnow()
+        self.queue.update_one(
+            {"_id": document["_id"], "locked_by": self.worker_id},
+            {"$set": {"status": "sent", "finished_at": now, "attempts": document["attempts"] + 1},
+             "$unset": {"locked_by": "", "locked_until": "", "last_error": ""}},
+        )
+
+    def _mark_failed(self, document, error):
+        attempts = document["attempts"] + 1
+        update = {"attempts": attempts, "last_error": f"{type(error).__name__}: {error}"}
+        if _is_transient(error) and attempts < MAIL_MAX_ATTEMPTS:
+            update.update(status="queued", next_attempt_at=datetime.utcnow() + _backoff(attempts))
+        else:
+            update.update(status="failed", finished_at=datetime.utcnow())
+        self.queue.update_one(
+            {"_id": document["_id"], "locked_by": self.worker_id},
+            {"$set": update, "$unset": {"locked_by": "", "locked_until": ""}},
+        )
+
+    def run_batch(self):
+        """
+        Send up to MAIL_BATCH_SIZE messages over one SMTP session.
+
+        Returns:
+            int: Messages attempted (0 when the queue is empty or the daily cap is reached).
+        """
+        from extensions import mail
+
+        budget = min(MAIL_BATCH_SIZE, MAIL_DAILY_LIMIT - self.sent_last_day())
+        if budget <= 0:
+            return 0
+        document = self.claim()
+        if document is None:
+            return 0
+
+        attempted = 0
+        try:
+            with mail.connect() as connection:
+                while document is not None:
+                    attempted += 1
+                    self._pace()
+                    try:
+                        connection.send(self._message(document))
+                    except Exception as e:
+                        self._mark_failed(document, e)
+                        if isinstance(e, SESSION_ERRORS):
+                            document = None
+                            break  # the session is gone; reconnect on the next batch
+                    else:
+                        self._mark_sent(document)
+                    document = self.claim() if attempted < budget else None
+        except Exception as e:
+            # Could not open (or cleanly close) the session; the claimed message is retried
+            if document is not None:
+                self._mark_failed(document, e)
+            print(f"🚨 Mail worker SMTP error: {e}")
+        return attempted
+
+    def run(self, once=False):
+        """Process the queue until it is empty (once=True) or forever."""
+        with self.app.app_context():
+            while True:
+                attempted = self.run_batch()
+                if once and attempted == 0:
+                    return
+                if attempted == 0:
+                    time.sleep(MAIL_IDLE_SECONDS)
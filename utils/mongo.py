@@ -0,0 +1,177 @@
+# utils/mongo.py
+from pymongo import MongoClient, monitoring
+import os, threading, time
+
+
+def _env_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """
+    Tracks how long requests wait to check a connection out of the pool.
+    Check-out started/finished events arrive on the thread that is waiting.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.checkout_failures = 0
+            self.wait_total_ms = 0.0
+            self.wait_max_ms = 0.0
+            self.checked_out = 0
+            self.connections_created = 0
+            self.connections_closed = 0
+            self.pools_cleared = 0
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        waited_ms = (time.perf_counter() - getattr(self._local, "started", time.perf_counter())) * 1000
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.wait_total_ms += waited_ms
+            self.wait_max_ms = max(self.wait_max_ms, waited_ms)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.checkout_failures += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.connections_created += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.connections_closed += 1
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pools_cleared += 1
+
+    # Events the metrics do not need
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "avg_wait_ms": self.wait_total_ms / self.checkouts if self.checkouts else 0.0,
+                "max_wait_ms": self.wait_max_ms,
+                "checked_out": self.checked_out,
+                "open_connections": self.connections_created - self.connections_closed,
+                "connections_created": self.connections_created,
+                "pools_cleared": self.pools_cleared,
+            }
+
+
+class MongoConnectionManager:
+    """
+    Builds the MongoClient lazily, once per process.
+
+    MongoClient is not fork-safe: a client created in a gunicorn --preload master must not
+    be used by the workers. The client is keyed on the pid and dropped in forked children,
+    so each worker opens its own pool on first use instead of all of them inheriting one.
+    Pool size, timeouts and compression come from the MONGO_* environment variables.
+    """
+
+    def __init__(self, uri, database_name, event_listeners=()):
+        self.uri = uri
+        self.database_name = database_name
+        self.event_listeners = list(event_listeners)
+        self.pool_metrics = PoolMetricsListener()
+        self._client = None
+        self._pid = None
+        self._lock = threading.Lock()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def client_options(self):
+        options = {
+            "maxPoolSize": _env_int("MONGO_MAX_POOL_SIZE", 50),
+            "minPoolSize": _env_int("MONGO_MIN_POOL_SIZE", 0),
+            "maxConnecting": _env_int("MONGO_MAX_CONNECTING", 2),
+            "maxIdleTimeMS": _env_int("MONGO_MAX_IDLE_TIME_MS", 60000),
+            "waitQueueTimeoutMS": _env_int("MONGO_WAIT_QUEUE_TIMEOUT_MS", 2000),
+            "connectTimeoutMS": _env_int("MONGO_CONNECT_TIMEOUT_MS", 5000),
+            "serverSelectionTimeoutMS": _env_int("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000),
+            "socketTimeoutMS": _env_int("MONGO_SOCKET_TIMEOUT_MS", 20000),
+            "appname": os.getenv("MONGO_APP_NAME", "college_bound"),
+        }
+        compressors = os.getenv("MONGO_COMPRESSORS")  # e.g. "zstd,snappy,zlib"
+        if compressors:
+            options["compressors"] = compressors
+        return options
+
+    def _after_fork(self):
+        # Never close the parent's client from the child; just forget it
+        self._client = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.pool_metrics.reset()
+
+    def get_client(self):
+        if self._client is None or self._pid != os.getpid():
+            with self._lock:
+                if self._client is None or self._pid != os.getpid():
+                    self._client = MongoClient(
+                        self.uri,
+                        event_listeners=self.event_listeners + [self.pool_metrics],
+                        **self.client_options()
+                    )
+                    self._pid = os.getpid()
+        return self._client
+
+    def get_db(self):
+        return self.get_client()[self.database_name]
+
+    def close(self):
+        with self._lock:
+            if self._client is not None and self._pid == os.getpid():
+                self._client.close()
+            self._client = None
+            self._pid = None
+
+
+class LazyProxy:
+    """
+    Stands in for the module-level `client` / `db` objects in extensions.py so
+    `from extensions import db` keeps working while the real object is built per process.
+    """
+
+    __slots__ = ("_resolve",)
+
+    def __init__(self, resolve):
+        object.__setattr__(self, "_resolve", resolve)
+
+    def __getattr__(self, name):
+        return getattr(self._resolve(), name)
+
+    def __getitem__(self, name):
+        return self._resolve()[name]
+
+    def __repr__(self):
+        return f"<LazyProxy {self._resolve()!r}>"
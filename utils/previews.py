@@ -0,0 +1,146 @@
+# utils/previews.py
+from bson import ObjectId
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from extensions import db
+from utils.user_cache import invalidate_user
+import os, threading
+
+
+PREVIEW_ROOT = os.getenv("PREVIEW_ROOT", "uploads_private/previews")
+PREVIEW_WORKERS = int(os.getenv("PREVIEW_WORKERS", "2"))
+
+# variant name -> longest edge in pixels
+PREVIEW_SIZES = {
+    "thumb": 320,
+    "review": 1280,
+}
+PREVIEW_FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Return the per-process pool used for CPU-bound resizing, creating it on first use."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ProcessPoolExecutor(max_workers=PREVIEW_WORKERS)
+    return _executor
+
+
+def preview_dir_for(source_path):
+    """Mirror the upload's folder under PREVIEW_ROOT so previews stay private and per user."""
+    relative = os.path.relpath(os.path.dirname(source_path), "uploads_private")
+    return os.path.normpath(os.path.join(PREVIEW_ROOT, relative))
+
+
+def _open_source(source_path):
+    """Open an upload as a PIL image. PDFs are rasterised from their first page."""
+    # Imaging libraries are only needed inside the pool workers
+    from PIL import Image, ImageOps
+
+    if source_path.lower().endswith(".pdf"):
+        try:
+            import fitz  # PyMuPDF, only needed to render PDF uploads
+        except ImportError:
+            raise RuntimeError("PyMuPDF is required to render PDF previews.")
+        with fitz.open(source_path) as document:
+            page = document.load_page(0)
+            # Render close to the largest preview instead of at full print resolution
+            zoom = max(PREVIEW_SIZES.values()) / max(page.rect.width, page.rect.height)
+            pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+            return Image.frombytes("RGB", (pixmap.width, pixmap.height), pixmap.samples)
+
+    image = Image.open(source_path)
+    # Let the JPEG decoder downscale while reading instead of inflating a 12MP photo first
+    image.draft("RGB", (max(PREVIEW_SIZES.values()),) * 2)
+    # Phone photos carry their rotation in EXIF; bake it in before the metadata is dropped
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    return image
+
+
+def render_previews(source_path, dest_dir):
+    """
+    Build every preview variant for one upload. Runs inside the process pool.
+
+    Args:
+        source_path (str): Path of the accepted upload.
+        dest_dir (str): Folder the previews are written to.
+
+    Returns:
+        dict: {variant: {format: path}} for each file written.
+    """
+    os.makedirs(dest_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    from PIL import Image
+
+    image = _open_source(source_path)
+
+    written = {}
+    # Largest first so each smaller variant resizes from an already reduced image
+    for variant, edge in sorted(PREVIEW_SIZES.items(), key=lambda item: -item[1]):
+        image.thumbnail((edge, edge), Image.LANCZOS)
+        written[variant] = {}
+        for extension, (pil_format, options) in PREVIEW_FORMATS.items():
+            path = os.path.join(dest_dir, f"{stem}_{variant}.{extension}")
+            image.save(path, pil_format, **options)
+            written[variant][extension] = path
+    return written
+
+
+def _store_preview_paths(user_id, field, future):
+    """Record finished previews on the user's profile next to the original file."""
+    try:
+        previews = future.result()
+    except Exception as e:
+        print(f"🚨 Preview generation failed for {user_id} {field}: {e}")
+        db.users.update_one(
+            {"_id": ObjectId(user_id)},
+            {"$set": {f"profile.{field}_preview_status": "failed"}}
+        )
+        return
+
+    db.users.update_one(
+        {"_id": ObjectId(user_id)},
+        {"$set": {
+            f"profile.{field}_previews": previews,
+            f"profile.{field}_preview_status": "ready",
+            f"profile.{field}_preview_time": datetime.utcnow()
+        }}
+    )
+    invalidate_user(user_id)
+
+
+def schedule_previews(user_id, field, source_path):
+    """
+    Queue preview generation for an accepted upload without blocking the request.
+
+    Args:
+        user_id (str): Owner of the upload.
+        field (str): Profile key prefix of the upload, e.g. "front_of_id".
+        source_path (str): Path of the stored original.
+
+    Returns:
+        concurrent.futures.Future: Resolves to the written preview paths.
+    """
+    db.users.update_one(
+        {"_id": ObjectId(user_id)},
+        {"$set": {f"profile.{field}_preview_status": "pending"}}
+    )
+    future = get_executor().submit(render_previews, source_path, preview_dir_for(source_path))
+    future.add_done_callback(lambda done: _store_preview_paths(user_id, field, done))
+    return future
+
+
+def get_preview_path(profile, field, variant="thumb", extension="webp"):
+    """Look up a generated preview on a profile dict, or None if it is not ready yet."""
+    previews = (profile or {}).get(f"{field}_previews") or {}
+    return previews.get(variant, {}).get(extension)
@@ -4,14 +4,31 @@ import re
 from dotenv import load_dotenv
 from utils.security import handle_exception
 from flask import redirect, url_for
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from openai import OpenAI
+import threading
 
 load_dotenv()
 
 openai_api_key = os.getenv("OPENAI_API_KEY")
-openai_client = OpenAI(api_key = openai_api_key)
+
+# openai and scikit-learn are slow to import; they load on the first chatbot request
+_openai_client = None
+_knowledge_bases = {}
+_lock = threading.Lock()
+
+def get_openai_client():
+    global _openai_client
+    if _openai_client is None:
+        with _lock:
+            if _openai_client is None:
+                from openai import OpenAI
+                _openai_client = OpenAI(api_key = openai_api_key)
+    return _openai_client
+
+def get_knowledge_base(filepath):
+    """Parse the Q&A file once per process."""
+    if filepath not in _knowledge_bases:
+        _knowledge_bases[filepath] = load_knowledge_base(filepath)
+    return _knowledge_bases[filepath]
 
 # Load Q&A data from text file into pairs
 def load_knowledge_base(filepath):
@@ -38,6 +55,9 @@ def get_relevant_answer(query, qa_pairs):
         if not qa_pairs:
             return "No data available."
 
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.metrics.pairwise import cosine_similarity
+
         questions = [q for q, a in qa_pairs]
         vectorizer = TfidfVectorizer().fit_transform(questions + [query])
         similarities = cosine_similarity(vectorizer[-1], vectorizer[:-1]).flatten()
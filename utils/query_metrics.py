@@ -0,0 +1,154 @@
+# utils/query_metrics.py
+from collections import Counter
+from flask import current_app, g, has_request_context, request
+from pymongo import monitoring
+import os, threading
+
+
+# A query shape repeated this many times inside one request is reported as an N+1 candidate
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "3"))
+
+# Per-endpoint totals for this worker process, shown on the admin metrics page
+endpoint_totals = {}
+_totals_lock = threading.Lock()
+
+
+def query_shape(command_name, command):
+    """
+    Reduce a command to its shape: collection plus filter keys and operators, with values
+    replaced by their type. Two lookups that only differ by _id have the same shape.
+    """
+    collection = command.get(command_name)
+    if command_name == "aggregate":
+        stages = [next(iter(stage), "?") for stage in command.get("pipeline", [])]
+        return f"{collection}.aggregate{stages}"
+    body = command.get("filter", command.get("query", command.get("q")))
+    if body is None and command_name in ("update", "delete"):
+        statements = command.get("updates") or command.get("deletes") or [{}]
+        body = statements[0].get("q")
+    return f"{collection}.{command_name}({_shape_of(body)})"
+
+
+def _shape_of(value):
+    if isinstance(value, dict):
+        return "{" + ", ".join(f"{key}: {_shape_of(val)}" for key, val in sorted(value.items())) + "}"
+    if isinstance(value, list):
+        return "[" + (_shape_of(value[0]) if value else "") + "]"
+    return type(value).__name__ if value is not None else ""
+
+
+class RequestQueryStats:
+    """Mongo commands issued while serving one Flask request."""
+
+    __slots__ = ("count", "total_ms", "slowest_ms", "slowest_shape", "shapes", "pending")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.slowest_ms = 0.0
+        self.slowest_shape = None
+        self.shapes = Counter()
+        self.pending = {}
+
+    def record(self, shape, duration_ms):
+        self.count += 1
+        self.total_ms += duration_ms
+        self.shapes[shape] += 1
+        if duration_ms > self.slowest_ms:
+            self.slowest_ms = duration_ms
+            self.slowest_shape = shape
+
+    def n_plus_one(self):
+        return {shape: count for shape, count in self.shapes.items() if count >= N_PLUS_ONE_THRESHOLD}
+
+
+def current_stats():
+    """Stats object for the active request, or None outside a request."""
+    if not has_request_context():
+        return None
+    stats = g.get("_query_stats")
+    if stats is None:
+        stats = g._query_stats = RequestQueryStats()
+    return stats
+
+
+class QueryMetricsListener(monitoring.CommandListener):
+    """
+    Attributes each command to the Flask request running on the same thread.
+    Synchronous pymongo publishes started/succeeded events on the calling thread,
+    so flask.g is the request that issued the command.
+    """
+
+    def started(self, event):
+        stats = current_stats()
+        if stats is not None:
+            stats.pending[event.request_id] = query_shape(event.command_name, event.command)
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event)
+
+    def _finish(self, event):
+        stats = current_stats()
+        if stats is None:
+            return
+        shape = stats.pending.pop(event.request_id, None)
+        if shape is not None:
+            stats.record(shape, event.duration_micros / 1000.0)
+
+
+def _after_request(response):
+    stats = g.get("_query_stats")
+    if stats is None:
+        return response
+
+    # Unmatched URLs (scanner 404s) share one bucket so the process-wide totals stay bounded
+    endpoint = request.endpoint or "<unmatched>"
+    n_plus_one = stats.n_plus_one()
+    with _totals_lock:
+        totals = endpoint_totals.setdefault(endpoint, {
+            "requests": 0, "queries": 0, "total_ms": 0.0, "max_queries": 0,
+            "slowest_ms": 0.0, "slowest_shape": None, "n_plus_one": Counter()
+        })
+        totals["requests"] += 1
+        totals["queries"] += stats.count
+        totals["total_ms"] += stats.total_ms
+        totals["max_queries"] = max(totals["max_queries"], stats.count)
+        if stats.slowest_ms > totals["slowest_ms"]:
+            totals["slowest_ms"] = stats.slowest_ms
+            totals["slowest_shape"] = stats.slowest_shape
+        totals["n_plus_one"].update(n_plus_one.keys())
+
+    if current_app.debug:
+        response.headers["X-Mongo-Queries"] = str(stats.count)
+        response.headers["X-Mongo-Time-ms"] = f"{stats.total_ms:.1f}"
+        if stats.slowest_shape:
+            response.headers["X-Mongo-Slowest"] = f"{stats.slowest_ms:.1f}ms {stats.slowest_shape}"[:500]
+        if n_plus_one:
+            response.headers["X-Mongo-N-Plus-One"] = "; ".join(f"{count}x {shape}" for shape, count in n_plus_one.items())[:1000]
+    return response
+
+
+def init_app(app):
+    """Publish per-request totals after each response."""
+    app.after_request(_after_request)
+
+
+def metrics_snapshot():
+    """Per-endpoint rows for the admin page, busiest endpoints first."""
+    with _totals_lock:
+        rows = []
+        for endpoint, totals in endpoint_totals.items():
+            rows.append({
+                "endpoint": endpoint,
+                "requests": totals["requests"],
+                "avg_queries": totals["queries"] / totals["requests"],
+                "max_queries": totals["max_queries"],
+                "avg_ms": totals["total_ms"] / totals["requests"],
+                "slowest_ms": totals["slowest_ms"],
+                "slowest_shape": totals["slowest_shape"],
+                "n_plus_one": dict(totals["n_plus_one"]),
+            })
+    return sorted(rows, key=lambda row: row["avg_queries"] * row["requests"], reverse=True)
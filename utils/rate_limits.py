@@ -0,0 +1,126 @@
+# utils/rate_limits.py
+from datetime import datetime, timedelta
+from flask_limiter.util import get_remote_address
+from flask_login import current_user
+from limits.storage import Storage
+from pymongo import ASCENDING, ReturnDocument
+import os, time
+
+
+RATE_LIMIT_COLLECTION = "rate_limits"
+
+# Where counters live. The default shares them through Mongo across every worker and host;
+# "memory://" keeps them per process (tests, local runs). Any `limits` storage URI works.
+RATELIMIT_STORAGE_URI = os.getenv(
+    "RATELIMIT_STORAGE_URI",
+    "memory://" if os.getenv("FLASK_ENV", "development") == "development" else "collegebound+mongo://",
+)
+RATELIMIT_DEFAULT = os.getenv("RATELIMIT_DEFAULT", "30 per hour")
+
+# Per-route policies: endpoint -> (limits, methods counted; None counts every method).
+# Applied to the registered view functions in create_app, so routes need no decorators.
+ROUTE_LIMITS = {
+    # Each question is an OpenAI completion
+    "ai.ask_bot": ("10 per minute;100 per day", None),
+    # Uploads are virus-scanned through Cloudmersive and stored in GCS
+    "tours.upload_photo_id": ("5 per minute;30 per day", ["POST"]),
+    "tours.submit_background_check": ("5 per minute;30 per day", ["POST"]),
+    "parent.confirm_parent": ("5 per minute;30 per day", ["POST"]),
+    # Credential and email endpoints
+    "auth.login": ("10 per minute", ["POST"]),
+    "auth.signup": ("5 per minute;20 per hour", ["POST"]),
+    "auth.reset_password_request": ("5 per hour", ["POST"]),
+    "contact_submit": ("5 per hour", None),
+}
+
+
+def rate_limit_key():
+    """
+    Count per signed-in account, falling back to the client address. Students on one
+    school network share an address, so per-IP limits alone would throttle a whole class.
+    """
+    if current_user and current_user.is_authenticated:
+        return f"user:{current_user.get_id()}"
+    return f"ip:{get_remote_address()}"
+
+
+def apply_route_limits(app, limiter, policies=ROUTE_LIMITS):
+    """Wrap each registered endpoint named in policies with its limit."""
+    for endpoint, (limit_value, methods) in policies.items():
+        view = app.view_functions.get(endpoint)
+        if view is None:
+            continue  # blueprint not registered in this app
+        app.view_functions[endpoint] = limiter.limit(limit_value, methods=methods)(view)
+
+
+class MongoRateLimitStorage(Storage):
+    """
+    Fixed-window counters in one Mongo collection, shared by every worker and host.
+
+    Each key is one document {_id: key, count, expire_at}. incr is a single
+    find_one_and_update with an update pipeline, so concurrent hits never lose a count and
+    a window that has run out restarts atomically; a TTL index on expire_at removes spent
+    windows. Uses the app's shared, fork-safe client (extensions.mongo).
+
+    Selected with RATELIMIT_STORAGE_URI=collegebound+mongo://
+    """
+
+    STORAGE_SCHEME = ["collegebound+mongo"]
+
+    def __init__(self, uri=None, wrap_exceptions=False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self._indexed = False
+
+    @property
+    def base_exceptions(self):
+        from pymongo.errors import PyMongoError
+        return PyMongoError
+
+    @property
+    def collection(self):
+        from extensions import db
+
+        collection = db[RATE_LIMIT_COLLECTION]
+        if not self._indexed:
+            collection.create_index([("expire_at", ASCENDING)], name="expire_at_ttl", expireAfterSeconds=0)
+            self._indexed = True
+        return collection
+
+    def incr(self, key, expiry, elastic_expiry=False, amount=1):
+        now = datetime.utcnow()
+        new_expiry = now + timedelta(seconds=expiry)
+        live = {"$gt": ["$expire_at", now]}
+        document = self.collection.find_one_and_update(
+            {"_id": key},
+            [{"$set": {
+                "count": {"$cond": [live, {"$add": ["$count", amount]}, amount]},
+                "expire_at": new_expiry if elastic_expiry else {"$cond": [live, "$expire_at", new_expiry]},
+            }}],
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return document["count"]
+
+    def get(self, key):
+        document = self.collection.find_one({"_id": key, "expire_at": {"$gt": datetime.utcnow()}})
+        return document["count"] if document else 0
+
+    def get_expiry(self, key):
+        document = self.collection.find_one({"_id": key, "expire_at": {"$gt": datetime.utcnow()}})
+        if not document:
+            return time.time()
+        return (document["expire_at"] - datetime(1970, 1, 1)).total_seconds()
+
+    def check(self):
+        from extensions import client
+        try:
+            client.admin.command("ping")
+            return True
+        except Exception:
+            return False
+
+    def reset(self):
+        return self.collection.delete_many({}).deleted_count
+
+    def clear(self, key):
+        self.collection.delete_one({"_id": key})
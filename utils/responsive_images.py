@@ -0,0 +1,231 @@
+# utils/responsive_images.py
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from markupsafe import Markup, escape
+from flask import url_for
+from datetime import datetime
+import json, os, shutil, tempfile, urllib.request
+
+
+RESPONSIVE_DIR = "responsive"
+MANIFEST_NAME = "manifest.json"
+SOURCE_DIRS = ("img",)
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp", ".gif"}
+RESPONSIVE_WORKERS = int(os.getenv("RESPONSIVE_WORKERS", "2"))
+
+RESPONSIVE_WIDTHS = (320, 640, 1024, 1600)
+# Listed in the order browsers should prefer them; formats Pillow cannot encode are skipped
+RESPONSIVE_FORMATS = {
+    "avif": ("AVIF", "image/avif", {"quality": 55}),
+    "webp": ("WEBP", "image/webp", {"quality": 78, "method": 4}),
+    "jpeg": ("JPEG", "image/jpeg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+
+def _encodable_formats():
+    from PIL import features
+
+    available = {}
+    for extension, (pil_format, mimetype, options) in RESPONSIVE_FORMATS.items():
+        if extension == "avif" and not features.check("avif"):
+            try:
+                import pillow_avif  # noqa: F401  registers the AVIF plugin on older Pillow
+            except ImportError:
+                continue
+        available[extension] = (pil_format, mimetype, options)
+    return available
+
+
+def render_variants(source_path, dest_dir, stem):
+    """
+    Write every width/format variant of one image. Runs inside the process pool.
+
+    Widths larger than the original are skipped (the original width is always kept),
+    so nothing is ever upscaled. Images with transparency skip the JPEG fallback.
+
+    Args:
+        source_path (str): Image to resize.
+        dest_dir (str): Folder the variants are written to.
+        stem (str): File name prefix, e.g. "cbt_logo" -> cbt_logo-640.webp.
+
+    Returns:
+        dict: {"width", "height", "variants": [{"format", "mimetype", "width", "height", "path"}]}.
+    """
+    from PIL import Image, ImageOps
+
+    os.makedirs(dest_dir, exist_ok=True)
+    image = ImageOps.exif_transpose(Image.open(source_path))
+    has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+    image = image.convert("RGBA" if has_alpha else "RGB")
+    width, height = image.size
+
+    widths = sorted({w for w in RESPONSIVE_WIDTHS if w < width} | {width}, reverse=True)
+    formats = _encodable_formats()
+    variants = []
+    # Largest first so each smaller width resizes from an already reduced image
+    for target_width in widths:
+        target_height = max(1, round(height * target_width / width))
+        if image.size != (target_width, target_height):
+            image = image.resize((target_width, target_height), Image.LANCZOS)
+        for extension, (pil_format, mimetype, options) in formats.items():
+            if has_alpha and extension == "jpeg":
+                continue
+            path = os.path.join(dest_dir, f"{stem}-{target_width}.{extension}")
+            image.save(path, pil_format, **options)
+            variants.append({
+                "format": extension,
+                "mimetype": mimetype,
+                "width": target_width,
+                "height": target_height,
+                "path": path,
+            })
+    return {"width": width, "height": height, "variants": variants}
+
+
+def _relative_variants(result, static_folder):
+    """Store variant paths relative to the static folder so url_for('static') can build them."""
+    for variant in result["variants"]:
+        variant["path"] = os.path.relpath(variant["path"], static_folder).replace(os.sep, "/")
+    return result
+
+
+def build_static_variants(static_folder, workers=RESPONSIVE_WORKERS, progress=print):
+    """
+    Generate variants for every image under the static SOURCE_DIRS and write
+    responsive/manifest.json ({"img/cbt_logo.png": {"width", "height", "variants"}}).
+    Run before `flask build-assets` so the variants are fingerprinted too.
+    """
+    output_root = os.path.join(static_folder, RESPONSIVE_DIR)
+    shutil.rmtree(output_root, ignore_errors=True)
+    manifest = {}
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for source_dir in SOURCE_DIRS:
+            for root, _, files in os.walk(os.path.join(static_folder, source_dir)):
+                for name in files:
+                    stem, extension = os.path.splitext(name)
+                    if extension.lower() not in IMAGE_EXTENSIONS:
+                        continue
+                    source = os.path.join(root, name)
+                    relative = os.path.relpath(source, static_folder).replace(os.sep, "/")
+                    dest_dir = os.path.join(output_root, os.path.dirname(relative))
+                    futures[executor.submit(render_variants, source, dest_dir, stem)] = relative
+
+        for future in as_completed(futures):
+            relative = futures[future]
+            try:
+                manifest[relative] = _relative_variants(future.result(), static_folder)
+            except Exception as e:
+                progress(f"🚨 Could not build variants for {relative}: {e}")
+
+    os.makedirs(output_root, exist_ok=True)
+    with open(os.path.join(output_root, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    progress(f"Built responsive variants for {len(manifest)} static images")
+    return manifest
+
+
+def _download(url, dest_dir, name):
+    """Fetch a remote social photo to a temp file for the pool workers to read."""
+    path = os.path.join(dest_dir, name)
+    with urllib.request.urlopen(url, timeout=20) as response, open(path, "wb") as f:
+        shutil.copyfileobj(response, f)
+    return path
+
+
+def build_photo_variants(db, static_folder, workers=RESPONSIVE_WORKERS, rebuild=False, progress=print):
+    """
+    Generate variants for approved db.photos and store them on each document as
+    "responsive" (same shape as a manifest entry). Photos that already have variants
+    are skipped unless rebuild is set.
+    """
+    filter = {"approved": True}
+    if not rebuild:
+        filter["responsive"] = {"$exists": False}
+    photos = list(db.photos.find(filter, {"url": 1}))
+    output_dir = os.path.join(static_folder, RESPONSIVE_DIR, "photos")
+    built = 0
+
+    with tempfile.TemporaryDirectory() as download_dir, ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for photo in photos:
+            try:
+                source = _download(photo["url"], download_dir, str(photo["_id"])) if "://" in photo["url"] else photo["url"]
+            except Exception as e:
+                progress(f"🚨 Could not download photo {photo['_id']}: {e}")
+                continue
+            futures[executor.submit(render_variants, source, output_dir, str(photo["_id"]))] = photo["_id"]
+
+        for future in as_completed(futures):
+            photo_id = futures[future]
+            try:
+                result = _relative_variants(future.result(), static_folder)
+            except Exception as e:
+                progress(f"🚨 Could not build variants for photo {photo_id}: {e}")
+                continue
+            result["built_at"] = datetime.utcnow()
+            db.photos.update_one({"_id": photo_id}, {"$set": {"responsive": result}})
+            built += 1
+
+    progress(f"Built responsive variants for {built} of {len(photos)} photos")
+    return built
+
+
+def load_manifest(static_folder):
+    path = os.path.join(static_folder, RESPONSIVE_DIR, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _srcset(variants):
+    return ", ".join(
+        f"{url_for('static', filename=variant['path'])} {variant['width']}w" for variant in variants
+    )
+
+
+def init_app(app):
+    """
+    Register the responsive_img() Jinja helper.
+
+    {{ responsive_img('img/cbt_logo.png', 'Logo', sizes='240px', height=120) }} renders a
+    <picture> with one <source srcset> per format and an <img> carrying the intrinsic
+    width/height (so the layout does not shift). It also accepts a db.photos document.
+    Images without variants fall back to a plain <img>.
+    """
+    manifest = load_manifest(app.static_folder)
+    app.extensions["responsive_images"] = manifest
+
+    def responsive_img(image, alt="", sizes="100vw", **attributes):
+        if isinstance(image, dict):
+            entry, fallback = image.get("responsive"), image.get("url", "")
+        else:
+            entry, fallback = manifest.get(image), url_for("static", filename=image)
+
+        attributes.setdefault("loading", "lazy")
+        attributes.setdefault("decoding", "async")
+        if entry:
+            # Scale the intrinsic size when the caller fixes one dimension
+            if "height" in attributes and "width" not in attributes:
+                attributes["width"] = round(entry["width"] * int(attributes["height"]) / entry["height"])
+            elif "width" in attributes and "height" not in attributes:
+                attributes["height"] = round(entry["height"] * int(attributes["width"]) / entry["width"])
+            else:
+                attributes.setdefault("width", entry["width"])
+                attributes.setdefault("height", entry["height"])
+        rendered = " ".join(f'{name.rstrip("_").replace("_", "-")}="{escape(value)}"' for name, value in attributes.items())
+        img = Markup(f'<img src="{escape(fallback)}" alt="{escape(alt)}" {rendered}>')
+        if not entry:
+            return img
+
+        by_format = {}
+        for variant in entry["variants"]:
+            by_format.setdefault(variant["format"], []).append(variant)
+        sources = [
+            f'<source type="{variants[0]["mimetype"]}" srcset="{escape(_srcset(variants))}" sizes="{escape(sizes)}">'
+            for variants in by_format.values()
+        ]
+        return Markup(f"<picture>{''.join(sources)}{img}</picture>")
+
+    app.jinja_env.globals["responsive_img"] = responsive_img
@@ -0,0 +1,145 @@
+# utils/retention.py
+from datetime import datetime, timedelta
+from pymongo import ASCENDING
+from pymongo.errors import CollectionInvalid, OperationFailure
+from utils.slow_queries import SLOW_QUERY_CAP_BYTES, SLOW_QUERY_COLLECTION
+import os, re
+
+
+def _days(name, default):
+    return int(os.getenv(name, str(default))) * 86400
+
+
+# How long raw rows live. "ttl" entries become TTL indexes (expireAfterSeconds on a date
+# field); "capped" entries become fixed-size collections for insert-only logs read newest
+# first. Collections whose rows are updated in place or must roll up before they go away
+# use TTL, since a capped collection drops old rows by size without warning.
+RETENTION = {
+    "error_logs": {"ttl": [
+        ("last_seen", _days("ERROR_LOG_RETENTION_DAYS", 90)),
+        ("timestamp", _days("ERROR_LOG_RETENTION_DAYS", 90)),  # per-occurrence rows written before grouping
+    ]},
+    "error_log_daily": {"ttl": [("day", _days("ROLLUP_RETENTION_DAYS", 730))]},
+    "unanswered": {"ttl": [("timestamp", _days("UNANSWERED_RETENTION_DAYS", 180))]},
+    "unanswered_daily": {"ttl": [("day", _days("ROLLUP_RETENTION_DAYS", 730))]},
+    "messages": {"ttl": [("timestamp", _days("MESSAGE_RETENTION_DAYS", 365))]},
+    "temporary_selections": {"ttl": [("date_added_to_tour", _days("TEMPORARY_SELECTION_RETENTION_DAYS", 14))]},
+    # Only sent and failed messages have finished_at; queued ones never expire
+    "mail_queue": {"ttl": [("finished_at", _days("MAIL_QUEUE_RETENTION_DAYS", 30))]},
+    SLOW_QUERY_COLLECTION: {"capped": SLOW_QUERY_CAP_BYTES},
+}
+
+ROLLUP_STATE_COLLECTION = "retention_state"
+
+_STOPWORDS = {
+    "a", "an", "and", "are", "at", "be", "can", "do", "does", "for", "how", "i", "if", "in", "is",
+    "it", "me", "my", "of", "on", "or", "the", "there", "to", "we", "what", "when", "where", "who",
+    "will", "with", "you", "your",
+}
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def question_cluster(question, max_terms=12):
+    """
+    Cluster key for a chatbot question: its distinct content words, sorted, so
+    "When is the next tour?" and "next tour when" land in the same rollup.
+    """
+    terms = sorted({word for word in _WORD.findall(str(question).lower()) if word not in _STOPWORDS})
+    return " ".join(terms[:max_terms]) or "(empty)"
+
+
+def day_start(value):
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def apply_retention(db, collections=None):
+    """
+    Create the TTL indexes and capped collections in RETENTION. A TTL index whose
+    expiry changed is updated in place with collMod instead of being rebuilt.
+
+    Returns:
+        dict: {collection: [status lines]}
+    """
+    results = {}
+    for collection, policy in RETENTION.items():
+        if collections and collection not in collections:
+            continue
+        statuses = results[collection] = []
+
+        if "capped" in policy:
+            try:
+                db.create_collection(collection, capped=True, size=policy["capped"])
+                statuses.append(f"created capped ({policy['capped']} bytes)")
+            except CollectionInvalid:
+                statuses.append("exists")
+
+        for field, seconds in policy.get("ttl", []):
+            name = f"{field}_ttl"
+            try:
+                db[collection].create_index([(field, ASCENDING)], name=name, expireAfterSeconds=seconds)
+                statuses.append(f"{name}: {seconds // 86400} days")
+            except OperationFailure as e:
+                if e.code not in (85, 86):  # IndexOptionsConflict / IndexKeySpecsConflict
+                    statuses.append(f"{name}: failed: {e}")
+                    continue
+                db.command("collMod", collection, index={"name": name, "expireAfterSeconds": seconds})
+                statuses.append(f"{name}: expiry changed to {seconds // 86400} days")
+    return results
+
+
+def rollup_unanswered(db, now=None, progress=print):
+    """
+    Count unanswered questions per cluster per day into unanswered_daily for every
+    complete day since the last run. Days are recomputed whole and merged by _id, so a
+    rerun is harmless. Run daily (`flask retention-rollup`); raw rows outlive the
+    rollup lag by months, so nothing expires before it is counted.
+    """
+    today = day_start(now or datetime.utcnow())
+    state = db[ROLLUP_STATE_COLLECTION].find_one({"_id": "unanswered_daily"})
+    if state:
+        start = state["rolled_up_to"]
+    else:
+        oldest = db.unanswered.find_one({}, {"timestamp": 1}, sort=[("timestamp", ASCENDING)])
+        if oldest is None:
+            return 0
+        start = day_start(oldest["timestamp"])
+    if start >= today:
+        return 0
+
+    cluster = {"$ifNull": ["$cluster", {"$toLower": "$question"}]}
+    day = {"$dateTrunc": {"date": "$timestamp", "unit": "day"}}
+    db.unanswered.aggregate([
+        {"$match": {"timestamp": {"$gte": start, "$lt": today}}},
+        {"$group": {
+            "_id": {"cluster": cluster, "day": day},
+            "count": {"$sum": 1},
+            "example": {"$last": "$question"},
+        }},
+        {"$project": {
+            "_id": {"$concat": ["$_id.cluster", "|", {"$dateToString": {"date": "$_id.day", "format": "%Y-%m-%d"}}]},
+            "cluster": "$_id.cluster",
+            "day": "$_id.day",
+            "count": 1,
+            "example": 1,
+        }},
+        {"$merge": {"into": "unanswered_daily", "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}},
+    ])
+    db[ROLLUP_STATE_COLLECTION].update_one(
+        {"_id": "unanswered_daily"},
+        {"$set": {"rolled_up_to": today, "updated_at": datetime.utcnow()}},
+        upsert=True,
+    )
+    days = (today - start).days
+    progress(f"Rolled up unanswered questions for {days} day(s) up to {today:%Y-%m-%d}")
+    return days
+
+
+def top_unanswered_clusters(db, days=30, limit=20):
+    """Most frequent question clusters over the last `days` complete days, from the rollup."""
+    since = day_start(datetime.utcnow()) - timedelta(days=days)
+    return list(db.unanswered_daily.aggregate([
+        {"$match": {"day": {"$gte": since}}},
+        {"$group": {"_id": "$cluster", "count": {"$sum": "$count"}, "example": {"$last": "$example"}}},
+        {"$sort": {"count": -1}},
+        {"$limit": limit},
+    ]))
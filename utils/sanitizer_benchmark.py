@@ -0,0 +1,72 @@
+# utils/sanitizer_benchmark.py
+"""
+Micro-benchmark: the previous sanitize_input body against utils/sanitizer.py.
+
+    python -m utils.sanitizer_benchmark [--number 20000]
+
+Checks that both give identical output on the sample inputs before timing them.
+"""
+from utils.sanitizer import sanitize, sanitize_many
+import argparse, re, timeit
+
+
+SAMPLES = [
+    ("Jane", ""),
+    ("  jane.doe@example.com ", ""),
+    ("123 Main St. Apt #4, Augusta", ""),
+    ("(706) 555-0134", "()"),
+    ("<script>alert('x')</script>", ""),
+    ("José Núñez-García", ""),
+    ("https://example.com/tour?id=5", ":/?="),
+    ("65f1c2a9e4b0a1b2c3d4e5f6", ""),
+]
+LIST_SAMPLE = [value for value, _ in SAMPLES] * 4
+
+
+def legacy_sanitize(value, exception=""):
+    """sanitize_input as it was: the pattern is rebuilt and re.sub'd on every call."""
+    allowed = r"\w\s@.\-"
+    if exception:
+        allowed += re.escape(exception)
+    pattern = rf"[^{allowed}]"
+
+    def clean(val):
+        val = str(val).strip()
+        return re.sub(pattern, "", val)
+
+    if isinstance(value, list):
+        return [clean(v) for v in value if v is not None]
+    return clean(value)
+
+
+def check_equivalence():
+    every_ascii = "".join(map(chr, range(128)))
+    for value, exception in SAMPLES + [(every_ascii, ""), (every_ascii, "()#,:/?=&+")]:
+        expected, actual = legacy_sanitize(value, exception), sanitize(value, exception)
+        assert expected == actual, f"{value!r}: {expected!r} != {actual!r}"
+    assert legacy_sanitize(LIST_SAMPLE) == sanitize_many(LIST_SAMPLE)
+
+
+def run(number=20000):
+    check_equivalence()
+    cases = {
+        "single values": (
+            lambda: [legacy_sanitize(value, exception) for value, exception in SAMPLES],
+            lambda: [sanitize(value, exception) for value, exception in SAMPLES],
+        ),
+        f"list of {len(LIST_SAMPLE)}": (
+            lambda: legacy_sanitize(LIST_SAMPLE),
+            lambda: sanitize_many(LIST_SAMPLE),
+        ),
+    }
+    print(f"{'case':<16} {'legacy µs':>10} {'engine µs':>10} {'speedup':>8}")
+    for name, (legacy, engine) in cases.items():
+        legacy_us = min(timeit.repeat(legacy, number=number, repeat=3)) / number * 1e6
+        engine_us = min(timeit.repeat(engine, number=number, repeat=3)) / number * 1e6
+        print(f"{name:<16} {legacy_us:>10.2f} {engine_us:>10.2f} {legacy_us / engine_us:>7.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=20000, help="Calls per timing run.")
+    run(parser.parse_args().number)
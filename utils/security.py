@@ -1,25 +1,35 @@
 # utils/security.py
 from bson import ObjectId
-from cloudmersive_virus_api_client.rest import ApiException
 from datetime import datetime
 from extensions import db, mail, serializer
 from functools import wraps
-from flask import current_app, request, redirect, url_for, flash
+from flask import current_app, has_app_context, has_request_context, request, redirect, url_for, flash
 from flask_login import current_user
-from google.cloud import storage
 from dotenv import load_dotenv
-import cloudmersive_virus_api_client, os, random, re, string, time, traceback
+from utils.error_sink import error_sink
+from utils.sanitizer import sanitize, sanitize_many
+from utils.storage import upload_file
+import logging, os, random, re, string, threading, time, traceback
 
 
 # Load environment variables
 load_dotenv()
 
 
-# Pre-configure once when module loads
-configuration = cloudmersive_virus_api_client.Configuration()
-configuration.api_key['Apikey'] = os.getenv("CLOUDMERSIVE")
+# Configured once per process, on the first upload rather than at import
+_scan_api = None
+_scan_api_lock = threading.Lock()
 
-api_instance = cloudmersive_virus_api_client.ScanApi(cloudmersive_virus_api_client.ApiClient(configuration))
+def get_scan_api():
+    global _scan_api
+    if _scan_api is None:
+        with _scan_api_lock:
+            if _scan_api is None:
+                import cloudmersive_virus_api_client
+                configuration = cloudmersive_virus_api_client.Configuration()
+                configuration.api_key['Apikey'] = os.getenv("CLOUDMERSIVE")
+                _scan_api = cloudmersive_virus_api_client.ScanApi(cloudmersive_virus_api_client.ApiClient(configuration))
+    return _scan_api
 
 def generate_datetime_seed():
     """Create a reproducible seed based on current datetime (YYYYMMDDHHMMSS)."""
@@ -37,66 +47,57 @@ def generate_secure_passphrase(length=23):
 
 def handle_exception(e):
     """
-    Handles an exception by saving to DB, logging, and printing stack trace if in development.
+    Handles an exception by queueing it for the error log, logging, and printing the stack
+    trace if in development. Safe to call without a request or app context; the database
+    write happens in batches on a background thread (see utils/error_sink.py).
     """
+    in_request = has_request_context()
     error_info = {
-        "error_message": str(e),
-        "stack_trace": traceback.format_exc(),
-        "path": request.path if request else "N/A",
-        "method": request.method if request else "N/A",
-        "user_agent": request.headers.get('User-Agent') if request else "N/A",
-        "remote_addr": request.remote_addr if request else "N/A",
-        "timestamp": datetime.utcnow()
+        "path": request.path if in_request else "N/A",
+        "method": request.method if in_request else "N/A",
+        "user_agent": request.headers.get('User-Agent') if in_request else "N/A",
+        "remote_addr": request.remote_addr if in_request else "N/A",
     }
 
-    save_error_to_db(error_info)
+    save_error_to_db(e, error_info)
 
     if os.getenv("FLASK_ENV") == "development":
         # Print full error to console for fast troubleshooting
         print("="*80)
         print("🚨 Exception Caught!")
-        print(f"Error: {error_info['error_message']}")
+        print(f"Error: {e}")
         print(f"Path: {error_info['path']} Method: {error_info['method']}")
         print(f"User-Agent: {error_info['user_agent']}")
         print(f"Remote IP: {error_info['remote_addr']}")
         print("Full Stack Trace:")
-        print(error_info["stack_trace"])
+        print("".join(traceback.format_exception(type(e), e, e.__traceback__)))
         print("="*80)
-    else:
+    elif has_app_context():
         # Production: just log to app's logger
         current_app.logger.error(f"Internal Server Error: {e}")
+    else:
+        logging.getLogger(__name__).error(f"Internal Server Error: {e}")
 
-def save_error_to_db(error_info):
+def save_error_to_db(e, error_info=None):
     """
-    Save the structured error info to an external error_logs database.
+    Queue the exception for the error_logs collection, grouped by fingerprint.
     """
-    db.error_logs.insert_one(error_info)
+    error_sink.record(e, error_info)
 
 def sanitize_input(value, exception: str = ""):
     """
     Sanitize a string or list by removing unsafe characters.
     If `exception` is provided, those characters will be preserved.
+    Patterns are compiled once per exception set (see utils/sanitizer.py).
     """
     try:
         if not value:
             return "" if not isinstance(value, list) else []
 
-        # Define default pattern of allowed characters
-        allowed = r"\w\s@.\-"
-        if exception:
-            # Escape each character in the exception string
-            allowed += re.escape(exception)
-
-        pattern = rf"[^{allowed}]"
-
-        def clean(val):
-            val = str(val).strip()
-            return re.sub(pattern, "", val)
-
         if isinstance(value, list):
-            return [clean(v) for v in value if v is not None]
+            return sanitize_many(value, exception)
 
-        return clean(value)
+        return sanitize(value, exception)
 
     except Exception as e:
         handle_exception(e)
@@ -137,14 +138,13 @@ def validate_file(file):
         handle_exception(e)
         return redirect(url_for('home'))
 
-def upload_to_gcs(file, filename, bucket_name="your-gcs-bucket-name"):
+def upload_to_gcs(file, filename, bucket_name=None, folder=None):
+    """
+    Upload a file through the shared storage service (see utils/storage.py)
+    and return its public URL.
+    """
     try:
-        client = storage.Client()
-        bucket = client.bucket(bucket_name)
-        blob = bucket.blob(filename)
-        blob.upload_from_file(file, content_type=file.content_type)
-        blob.make_public()
-        return blob.public_url
+        return upload_file(file, filename, folder=folder, bucket_name=bucket_name, public=True)
     except Exception as e:
         handle_exception(e)
         return redirect(url_for('home'))
@@ -153,19 +153,19 @@ def safe_get_parameter_list(parameter_name, exception=None):
     values = request.form.getlist(parameter_name) or request.args.getlist(parameter_name)
 
     if values and isinstance(values, list):
-        return [sanitize_input(v, exception) for v in values if v]
+        return sanitize_many([v for v in values if v], exception)
     else:
         single_value = request.form.get(parameter_name) or request.args.get(parameter_name)
         return sanitize_input(single_value, exception)
     
 def safe_get_parameter(parameter, exception=None):
-    form_value = sanitize_input(request.form.get(parameter), exception)
-    if form_value and form_value != "":
-        return form_value
-    
-    args_value = sanitize_input(request.args.get(parameter), exception)
-    if args_value and args_value != "":
-        return args_value
+    # Only sanitize values that were actually sent; args are read only if the form has nothing usable
+    for source in (request.form, request.args):
+        raw_value = source.get(parameter)
+        if raw_value:
+            value = sanitize(raw_value, exception)
+            if value:
+                return value
 
     return None
     
@@ -174,8 +174,9 @@ def scan_file_for_viruses(filepath):
     Scan a file using Cloudmersive Virus Scan API.
     Pass the file path string. Return True if clean, False if infected or scan error.
     """
+    from cloudmersive_virus_api_client.rest import ApiException
     try:
-        result = api_instance.scan_file(filepath)  # PATH STRING, not file object!
+        result = get_scan_api().scan_file(filepath)  # PATH STRING, not file object!
         return result.clean_result
     except ApiException as e:
         print(f"🚨 Cloudmersive Virus Scan API Error: {e}")
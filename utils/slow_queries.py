@@ -0,0 +1,128 @@
+# utils/slow_queries.py
+from datetime import datetime
+from flask import has_request_context, request
+from pymongo import monitoring
+from pymongo.errors import CollectionInvalid
+from utils.query_metrics import query_shape
+import os, queue, random, threading
+
+
+# Commands slower than this are logged; a negative value turns the log off
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+# Fraction of slow commands that are re-run through explain("executionStats")
+SLOW_QUERY_EXPLAIN_SAMPLE = float(os.getenv("SLOW_QUERY_EXPLAIN_SAMPLE", "0.1"))
+SLOW_QUERY_COLLECTION = "slow_queries"
+SLOW_QUERY_CAP_BYTES = int(os.getenv("SLOW_QUERY_CAP_BYTES", str(64 * 1024 * 1024)))
+
+EXPLAINABLE = {"find", "aggregate", "count", "distinct", "update", "delete", "findAndModify"}
+# Session and routing fields the driver adds; explain rejects them inside the wrapped command
+_DRIVER_FIELDS = {"lsid", "$db", "$clusterTime", "$readPreference", "txnNumber", "readConcern", "writeConcern"}
+
+_queue = queue.Queue(maxsize=1000)
+_worker = None
+_worker_lock = threading.Lock()
+
+
+class SlowQueryListener(monitoring.CommandListener):
+    """
+    Times every command on the shared client and hands slow ones to a background
+    writer, so logging and explain never add latency to the request that was slow.
+    """
+
+    def __init__(self):
+        self._pending = {}
+
+    def started(self, event):
+        if SLOW_QUERY_MS < 0 or event.command_name == "explain":
+            return
+        if event.command.get(event.command_name) == SLOW_QUERY_COLLECTION:
+            return
+        endpoint = (request.endpoint or request.path) if has_request_context() else None
+        self._pending[(event.connection_id, event.request_id)] = (event.database_name, event.command_name, event.command, endpoint)
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event)
+
+    def _finish(self, event):
+        pending = self._pending.pop((event.connection_id, event.request_id), None)
+        if pending is None:
+            return
+        duration_ms = event.duration_micros / 1000.0
+        if duration_ms < SLOW_QUERY_MS:
+            return
+
+        database_name, command_name, command, endpoint = pending
+        entry = {
+            "timestamp": datetime.utcnow(),
+            "database": database_name,
+            "command": command_name,
+            "collection": command.get(command_name),
+            "shape": query_shape(command_name, command),
+            "endpoint": endpoint,
+            "duration_ms": round(duration_ms, 1),
+            "failed": isinstance(event, monitoring.CommandFailedEvent),
+        }
+        explain = None
+        if command_name in EXPLAINABLE and random.random() < SLOW_QUERY_EXPLAIN_SAMPLE:
+            explain = {key: value for key, value in command.items() if key not in _DRIVER_FIELDS}
+        _enqueue(entry, explain)
+
+
+def _enqueue(entry, explain):
+    _ensure_worker()
+    try:
+        _queue.put_nowait((entry, explain))
+    except queue.Full:
+        pass  # shed log entries rather than block a request
+
+
+def _ensure_worker():
+    global _worker
+    if _worker is None or not _worker.is_alive():
+        with _worker_lock:
+            if _worker is None or not _worker.is_alive():
+                _worker = threading.Thread(target=_drain, name="slow-query-log", daemon=True)
+                _worker.start()
+
+
+def _drain():
+    # Imported here: extensions builds the client this listener is attached to
+    from extensions import client, db
+
+    _ensure_capped_collection(db)
+    while True:
+        entry, explain = _queue.get()
+        try:
+            if explain is not None:
+                result = client[entry["database"]].command({"explain": explain, "verbosity": "executionStats"})
+                stats = result.get("executionStats", {})
+                entry["explain"] = {
+                    "winning_plan": result.get("queryPlanner", {}).get("winningPlan"),
+                    "n_returned": stats.get("nReturned"),
+                    "keys_examined": stats.get("totalKeysExamined"),
+                    "docs_examined": stats.get("totalDocsExamined"),
+                    "execution_ms": stats.get("executionTimeMillis"),
+                }
+            db[SLOW_QUERY_COLLECTION].insert_one(entry)
+        except Exception as e:
+            print(f"🚨 Slow query log write failed: {e}")
+
+
+def _ensure_capped_collection(db):
+    try:
+        db.create_collection(SLOW_QUERY_COLLECTION, capped=True, size=SLOW_QUERY_CAP_BYTES)
+    except CollectionInvalid:
+        pass  # already exists
+
+
+def recent_slow_queries(db, limit=200, endpoint=None, collection=None):
+    """Newest slow-query entries first; a capped collection keeps insertion order."""
+    filter = {}
+    if endpoint:
+        filter["endpoint"] = endpoint
+    if collection:
+        filter["collection"] = collection
+    return list(db[SLOW_QUERY_COLLECTION].find(filter).sort("$natural", -1).limit(limit))
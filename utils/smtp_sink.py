@@ -0,0 +1,113 @@
+# utils/smtp_sink.py
+from email import message_from_bytes, policy
+import os, socketserver, threading
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP (EHLO/HELO, MAIL, RCPT, DATA, RSET, NOOP, QUIT) for smtplib and Flask-Mail."""
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode("ascii"))
+
+    def handle(self):
+        sender, recipients = None, []
+        self.reply("220 college-bound smtp sink ready")
+        for raw in self.rfile:
+            command = raw.decode("utf-8", "replace").rstrip("\r\n")
+            verb = command[:4].upper()
+            if verb == "EHLO":
+                # No STARTTLS or AUTH: configure MAIL_USE_TLS=False and no credentials
+                self.wfile.write(b"250-college-bound smtp sink\r\n250 8BITMIME\r\n")
+            elif verb == "HELO":
+                self.reply("250 college-bound smtp sink")
+            elif verb == "MAIL":
+                sender, recipients = command.split(":", 1)[1].strip().strip("<>"), []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                recipients.append(command.split(":", 1)[1].strip().strip("<>"))
+                self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                for data_line in self.rfile:
+                    if data_line in (b".\r\n", b".\n"):
+                        break
+                    lines.append(data_line[1:] if data_line.startswith(b"..") else data_line)
+                self.server.sink.deliver(sender, recipients, b"".join(lines))
+                sender, recipients = None, []
+                self.reply("250 OK: queued")
+            elif verb == "RSET":
+                sender, recipients = None, []
+                self.reply("250 OK")
+            elif verb == "NOOP":
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class SMTPSink:
+    """
+    A local SMTP server that accepts everything and keeps it, for tests and development.
+
+        with SMTPSink(port=1025) as sink:
+            ...  # app configured with MAIL_SERVER=localhost, MAIL_PORT=1025, MAIL_USE_TLS=False
+            assert sink.messages[0]["Subject"] == "Reset Your College Bound Tours Password"
+
+    Messages are parsed email.message.EmailMessage objects with .envelope_from and
+    .envelope_to set; with `directory`, each is also written there as an .eml file.
+    """
+
+    def __init__(self, host="localhost", port=1025, directory=None, echo=False):
+        self.messages = []
+        self.directory = directory
+        self.echo = echo
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), _SMTPHandler)
+        self._server.sink = self
+        self._thread = None
+
+    @property
+    def address(self):
+        return self._server.server_address
+
+    def deliver(self, sender, recipients, data):
+        message = message_from_bytes(data, policy=policy.default)
+        message.envelope_from, message.envelope_to = sender, recipients
+        with self._lock:
+            self.messages.append(message)
+            count = len(self.messages)
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(os.path.join(self.directory, f"{count:06d}.eml"), "wb") as f:
+                f.write(data)
+        if self.echo:
+            print(f"📧 {sender} -> {', '.join(recipients)}: {message['Subject']}")
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="smtp-sink", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def serve_forever(self):
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,183 @@
+# utils/storage.py
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+import mimetypes, os, shutil, threading, time
+
+load_dotenv()
+
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "gcs").lower()  # "gcs" or "local"
+GCS_BUCKET = os.getenv("GCS_BUCKET", "your-gcs-bucket-name")
+LOCAL_BUCKET_ROOT = os.getenv("LOCAL_BUCKET_ROOT", "local_bucket")
+
+# Resumable uploads send the body in chunks; GCS requires a multiple of 256 KB
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+UPLOAD_ATTEMPTS = int(os.getenv("UPLOAD_ATTEMPTS", "4"))
+UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", "4"))
+
+_clients = {}
+_clients_lock = threading.Lock()
+_upload_pool = None
+
+
+class PreconditionFailed(Exception):
+    """The local fake's counterpart of google.api_core.exceptions.PreconditionFailed."""
+
+    code = 412
+
+
+class LocalBucket:
+    """
+    Filesystem stand-in for a GCS bucket so uploads can be exercised without credentials.
+    Objects are written under LOCAL_BUCKET_ROOT/<bucket_name>/<object name>.
+    """
+
+    def __init__(self, bucket_name, root=LOCAL_BUCKET_ROOT):
+        self.name = bucket_name
+        self.root = os.path.join(root, bucket_name)
+
+    def upload(self, file, object_name, content_type=None, public=False):
+        path = os.path.join(self.root, object_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        file.seek(0)
+        try:
+            # Create-only like GCSBucket.upload (if_generation_match=0): an existing name is a 412
+            out = open(path, "xb")
+        except FileExistsError:
+            raise PreconditionFailed(f"Object {object_name} already exists in {self.name}")
+        with out:
+            shutil.copyfileobj(file, out, UPLOAD_CHUNK_SIZE)
+        return f"file://{os.path.abspath(path)}"
+
+    def stored_url(self, object_name, public=False):
+        return f"file://{os.path.abspath(os.path.join(self.root, object_name))}"
+
+    def exists(self, object_name):
+        return os.path.exists(os.path.join(self.root, object_name))
+
+
+class GCSBucket:
+    """Thin wrapper around a google.cloud.storage bucket that uploads in resumable chunks."""
+
+    def __init__(self, bucket_name):
+        self.name = bucket_name
+        self.bucket = get_client().bucket(bucket_name)
+
+    def upload(self, file, object_name, content_type=None, public=False):
+        from google.cloud.storage.retry import DEFAULT_RETRY
+
+        blob = self.bucket.blob(object_name, chunk_size=UPLOAD_CHUNK_SIZE)
+        # if_generation_match=0 makes the upload create-only, so library retries are idempotent
+        blob.upload_from_file(
+            file,
+            content_type=content_type,
+            rewind=True,
+            if_generation_match=0,
+            retry=DEFAULT_RETRY,
+        )
+        if public:
+            blob.make_public()
+            return blob.public_url
+        return f"gs://{self.name}/{object_name}"
+
+    def stored_url(self, object_name, public=False):
+        """URL of an object that is already stored, e.g. by an attempt whose response was lost."""
+        blob = self.bucket.blob(object_name)
+        if public:
+            blob.make_public()
+            return blob.public_url
+        return f"gs://{self.name}/{object_name}"
+
+    def exists(self, object_name):
+        return self.bucket.blob(object_name).exists()
+
+
+def get_client():
+    """
+    Return this process's storage.Client, building it once.
+    Keyed by pid so a client created before a prefork server forks is not reused by workers.
+    """
+    pid = os.getpid()
+    client = _clients.get(pid)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(pid)
+            if client is None:
+                from google.cloud import storage
+                client = storage.Client()
+                _clients.clear()
+                _clients[pid] = client
+    return client
+
+
+def get_bucket(bucket_name=None):
+    """Return the configured bucket backend (real GCS or the local fake)."""
+    bucket_name = bucket_name or GCS_BUCKET
+    if STORAGE_BACKEND == "local":
+        return LocalBucket(bucket_name)
+    return GCSBucket(bucket_name)
+
+
+def _object_name(filename, folder=None):
+    return f"{folder.strip('/')}/{filename}" if folder else filename
+
+
+def upload_file(file, filename, folder=None, bucket_name=None, content_type=None, public=False):
+    """
+    Upload one file-like object, retrying transient failures with exponential backoff.
+
+    Args:
+        file: File-like object (werkzeug FileStorage or open file).
+        filename (str): Object name inside the folder.
+        folder (str): Optional prefix, e.g. "parent_ids".
+        bucket_name (str): Defaults to GCS_BUCKET.
+        content_type (str): Defaults to the upload's content type or a guess from filename.
+        public (bool): Make the object publicly readable and return its public URL.
+
+    Returns:
+        str: URL of the stored object.
+    """
+    object_name = _object_name(filename, folder)
+    content_type = content_type or getattr(file, "content_type", None) or mimetypes.guess_type(filename)[0]
+    stream = getattr(file, "stream", file)
+    bucket = get_bucket(bucket_name)
+
+    for attempt in range(1, UPLOAD_ATTEMPTS + 1):
+        try:
+            return bucket.upload(stream, object_name, content_type=content_type, public=public)
+        except Exception as e:
+            if attempt > 1 and getattr(e, "code", None) == 412:
+                # Uploads are create-only: a 412 on a retry means an earlier attempt was
+                # committed even though its response never arrived
+                return bucket.stored_url(object_name, public=public)
+            if attempt == UPLOAD_ATTEMPTS or not _is_transient(e):
+                raise
+            time.sleep(min(2 ** attempt * 0.25, 8))
+
+
+def upload_many(files, folder=None, bucket_name=None, public=False):
+    """
+    Upload several (file, filename) pairs in parallel, e.g. the front and back of an ID.
+
+    Returns:
+        list: URLs in the same order as `files`.
+    """
+    global _upload_pool
+    if _upload_pool is None:
+        with _clients_lock:
+            if _upload_pool is None:
+                _upload_pool = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS, thread_name_prefix="upload")
+
+    futures = [
+        _upload_pool.submit(upload_file, file, filename, folder, bucket_name, None, public)
+        for file, filename in files
+    ]
+    return [future.result() for future in futures]
+
+
+def _is_transient(error):
+    """Network errors and 408/429/5xx responses are worth another attempt."""
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    code = getattr(error, "code", None)
+    return code in (408, 429) or (isinstance(code, int) and code >= 500)
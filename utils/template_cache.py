@@ -0,0 +1,86 @@
+# utils/template_cache.py
+from jinja2 import FileSystemBytecodeCache
+import os, time
+
+
+TEMPLATE_CACHE_DIR = os.getenv("TEMPLATE_CACHE_DIR", ".jinja_cache")
+TEMPLATE_EXTENSIONS = (".html", ".xml")
+
+# Public pages rendered once per worker before it takes traffic (endpoint names, so a
+# create_app(config={"BLUEPRINTS": [...]}) without some blueprints just skips them)
+WARM_UP_ENDPOINTS = (
+    "home",
+    "about",
+    "contact",
+    "privacy",
+    "tours.tour_schedule",
+    "auth.login",
+    "auth.signup",
+    "auth.reset_password_request",
+)
+# WSGI environ key marking warm-up requests; clients cannot set it through headers
+WARM_UP_ENVIRON_KEY = "college_bound.warm_up"
+
+
+def init_app(app):
+    """
+    Store compiled template bytecode on disk so a new worker loads it instead of
+    recompiling every template on first hit. Entries are keyed on template source,
+    so an edited template is simply recompiled.
+    """
+    os.makedirs(TEMPLATE_CACHE_DIR, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(TEMPLATE_CACHE_DIR, "college_bound_%s.cache")
+
+
+def _is_page_template(name):
+    return name.endswith(TEMPLATE_EXTENSIONS) and not name.startswith("static/")
+
+
+def precompile_templates(app, progress=print):
+    """
+    Compile every template into the bytecode cache. Run at deploy time
+    (`flask precompile-templates`) so no worker pays the compile cost.
+
+    Returns:
+        list: (template name, error) for templates that failed to compile.
+    """
+    started = time.perf_counter()
+    failures = []
+    names = app.jinja_env.list_templates(filter_func=_is_page_template)
+    for name in names:
+        try:
+            app.jinja_env.get_template(name)
+        except Exception as e:
+            failures.append((name, e))
+            progress(f"🚨 {name}: {e}")
+    progress(f"Compiled {len(names) - len(failures)} of {len(names)} templates in {(time.perf_counter() - started) * 1000:.0f} ms")
+    return failures
+
+
+def is_warm_up_request(request):
+    return bool(request.environ.get(WARM_UP_ENVIRON_KEY))
+
+
+def warm_up(app, endpoints=WARM_UP_ENDPOINTS):
+    """
+    Render the public pages once through the test client, loading their templates
+    (and everything they extend or include) into this worker's in-memory cache.
+    Failures are logged and never stop the worker from starting.
+
+    Returns:
+        dict: {endpoint: status code or error string}.
+    """
+    from flask import url_for
+
+    results = {}
+    with app.test_request_context():
+        urls = {endpoint: url_for(endpoint) for endpoint in endpoints if endpoint in app.view_functions}
+
+    client = app.test_client()
+    for endpoint, url in urls.items():
+        try:
+            results[endpoint] = client.get(url, environ_overrides={WARM_UP_ENVIRON_KEY: True}).status_code
+        except Exception as e:
+            results[endpoint] = str(e)
+            app.logger.warning("Warm-up of %s failed: %s", url, e)
+    return results
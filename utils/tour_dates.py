@@ -0,0 +1,156 @@
+# utils/tour_dates.py
+from datetime import date, datetime, time as dt_time, timezone
+from pymongo import UpdateOne
+import os, time
+
+
+MIGRATION_ID = "tour_instances.date_to_bson"
+# _id types paged by the migration, and the BSON type name of each Python type
+_ID_TYPES = ("objectId", "string", "number")
+_ID_TYPE_NAMES = {str: "string", int: "number", float: "number"}
+
+# Until `flask migrate-tour-dates` has run everywhere, date filters also match the
+# legacy ISO strings. Set TOUR_DATES_LEGACY_STRINGS=false once the migration is done.
+LEGACY_STRINGS = os.getenv("TOUR_DATES_LEGACY_STRINGS", "true").lower() == "true"
+
+
+def parse_tour_date(value):
+    """
+    Normalise a stored or submitted tour date to a naive UTC datetime
+    (the form pymongo returns BSON dates in).
+
+    Accepts datetimes, dates, "YYYY-MM-DD" and ISO 8601 strings with or without "Z".
+    Returns None for empty or unparseable values.
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, date):
+        return datetime.combine(value, dt_time.min)
+    else:
+        try:
+            parsed = datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def format_tour_date(value, fmt="%Y-%m-%d"):
+    """Render a tour date for templates whatever type it is stored as."""
+    parsed = parse_tour_date(value)
+    return parsed.strftime(fmt) if parsed else ""
+
+
+def tour_date_filter(start=None, end=None, field="date"):
+    """
+    Typed date-range condition for tour_instances queries.
+
+    Args:
+        start: Inclusive lower bound (datetime, date or string).
+        end: Exclusive upper bound (datetime, date or string).
+        field (str): Field to filter, e.g. "tour.date" after a $lookup.
+
+    Returns:
+        dict: Query fragment to merge into a filter.
+    """
+    condition = {}
+    start, end = parse_tour_date(start), parse_tour_date(end)
+    if start:
+        condition["$gte"] = start
+    if end:
+        condition["$lt"] = end
+    if not LEGACY_STRINGS:
+        return {field: condition}
+
+    # Legacy rows hold ISO strings, which sort correctly as strings of the same format
+    legacy = {operator: bound.strftime("%Y-%m-%d") for operator, bound in condition.items()}
+    return {"$or": [{field: condition}, {field: {**legacy, "$type": "string"}}]}
+
+
+def upcoming_tours_filter(now=None, field="date"):
+    """Tours from the start of today (UTC) onwards."""
+    today = (now or datetime.utcnow()).replace(hour=0, minute=0, second=0, microsecond=0)
+    return tour_date_filter(start=today, field=field)
+
+
+def migrate_tour_dates(db, batch_size=500, throttle=0.0, progress=print):
+    """
+    Rewrite string tour_instances.date values as BSON dates in batches.
+
+    Resumable: the last converted _id of each _id type is checkpointed in db.migrations, and each
+    update is conditional on the original string, so a rerun skips converted rows
+    and never overwrites a date edited in the meantime. The original string is kept
+    in date_legacy.
+
+    Args:
+        batch_size (int): Documents per bulk_write.
+        throttle (float): Seconds to sleep between batches to spare the primary.
+        progress (callable): Receives one status line per batch.
+
+    Returns:
+        dict: Final checkpoint document.
+    """
+    checkpoint = db.migrations.find_one({"_id": MIGRATION_ID}) or {
+        "_id": MIGRATION_ID, "last_ids": {}, "converted": 0, "unparseable": [], "started_at": datetime.utcnow()
+    }
+    if "last_id" in checkpoint:
+        # Checkpoints written before pagination was split by _id type
+        last_id = checkpoint.pop("last_id")
+        checkpoint["last_ids"] = {} if last_id is None else {_ID_TYPE_NAMES.get(type(last_id), "objectId"): last_id}
+    remaining = db.tour_instances.count_documents({"date": {"$type": "string"}})
+    progress(f"{remaining} tour dates left to convert ({checkpoint['converted']} converted previously)")
+
+    started = time.monotonic()
+    converted_this_run = 0
+    # $gt only compares within one BSON type, so a single _id cursor would stop after
+    # the first type; each type present in _id is paged on its own
+    for id_type in _ID_TYPES:
+        while True:
+            filter = {"date": {"$type": "string"}, "_id": {"$type": id_type}}
+            if checkpoint["last_ids"].get(id_type) is not None:
+                filter["_id"]["$gt"] = checkpoint["last_ids"][id_type]
+            batch = list(db.tour_instances.find(filter, {"date": 1}).sort("_id", 1).limit(batch_size))
+            if not batch:
+                break
+
+            operations = []
+            for document in batch:
+                converted = parse_tour_date(document["date"])
+                if converted is None:
+                    checkpoint["unparseable"].append(document["_id"])
+                    continue
+                operations.append(UpdateOne(
+                    {"_id": document["_id"], "date": document["date"]},
+                    {"$set": {"date": converted, "date_legacy": document["date"]}}
+                ))
+
+            modified = db.tour_instances.bulk_write(operations, ordered=False).modified_count if operations else 0
+            checkpoint["converted"] += modified
+            converted_this_run += modified
+            checkpoint["last_ids"][id_type] = batch[-1]["_id"]
+            checkpoint["updated_at"] = datetime.utcnow()
+            db.migrations.replace_one({"_id": MIGRATION_ID}, checkpoint, upsert=True)
+
+            remaining -= len(batch)
+            rate = converted_this_run / max(time.monotonic() - started, 0.001)
+            progress(f"converted {checkpoint['converted']}, {max(remaining, 0)} left, {rate:.0f} docs/s")
+
+            if throttle:
+                time.sleep(throttle)
+
+    # Only finished when every string date left is a known unparseable one
+    left = db.tour_instances.count_documents({"date": {"$type": "string"}, "_id": {"$nin": checkpoint["unparseable"]}})
+    if left:
+        # They sit behind the checkpoint (edited mid-run, or inserted below it), so the
+        # next run has to page from the start again to reach them
+        checkpoint["last_ids"] = {}
+        progress(f"{left} string dates remain (edited during the run or with another _id type); run the migration again")
+    else:
+        checkpoint["finished_at"] = datetime.utcnow()
+    db.migrations.replace_one({"_id": MIGRATION_ID}, checkpoint, upsert=True)
+    if checkpoint["unparseable"]:
+        progress(f"{len(checkpoint['unparseable'])} dates could not be parsed and were left as strings")
+    return checkpoint
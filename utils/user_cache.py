@@ -0,0 +1,75 @@
+# utils/user_cache.py
+from bson import ObjectId
+from extensions import db
+from models.user import User
+import os, threading, time
+
+
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "30"))  # seconds
+USER_CACHE_MAX = int(os.getenv("USER_CACHE_MAX", "5000"))
+
+# Only what current_user needs on every request. The password hash never leaves Mongo here,
+# and the profile sub-document is loaded lazily by User.profile.
+SESSION_PROJECTION = User.projection()
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def _key(user_id):
+    return str(user_id)
+
+
+def load_session_user(user_id):
+    """
+    Return the session view of a user document, served from this process's cache
+    for up to USER_CACHE_TTL seconds.
+
+    The cache is per worker process: invalidate_user() clears the local copy right away,
+    other workers pick up the change when their entry expires.
+    """
+    key = _key(user_id)
+    now = time.monotonic()
+
+    entry = _cache.get(key)
+    if entry and entry[0] > now:
+        return entry[1]
+
+    user_doc = db.users.find_one({"_id": ObjectId(key)}, SESSION_PROJECTION)
+    if user_doc is None:
+        invalidate_user(key)
+        return None
+
+    with _lock:
+        if len(_cache) >= USER_CACHE_MAX:
+            _evict_expired(now)
+        _cache[key] = (now + USER_CACHE_TTL, user_doc)
+    return user_doc
+
+
+def invalidate_user(user_id):
+    """Drop a cached user after a profile, role or password write."""
+    with _lock:
+        _cache.pop(_key(user_id), None)
+
+
+def invalidate_user_by_email(email):
+    """Same as invalidate_user for writes that are keyed by email (password reset)."""
+    with _lock:
+        for key, (_, user_doc) in list(_cache.items()):
+            if user_doc.get("email") == email:
+                _cache.pop(key, None)
+
+
+def clear_user_cache():
+    with _lock:
+        _cache.clear()
+
+
+def _evict_expired(now):
+    """Called with the lock held once the cache is full; falls back to dropping the oldest half."""
+    for key in [k for k, (expires, _) in _cache.items() if expires <= now]:
+        del _cache[key]
+    if len(_cache) >= USER_CACHE_MAX:
+        for key in sorted(_cache, key=lambda k: _cache[k][0])[:USER_CACHE_MAX // 2]:
+            del _cache[key]